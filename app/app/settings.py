@@ -153,3 +153,75 @@ REST_FRAMEWORK = {
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Token resolutions are cached only when the alias names a cache shared
+# by all workers, which revocations are published through.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS') or None
+
+# List responses are cached per user when the timeout is positive, and
+# ETags are derived from the same per-user data version. Both need the
+# cache alias to point at a cache shared by all workers.
+RECIPE_CACHE_ALIAS = os.environ.get('RECIPE_CACHE_ALIAS', 'default')
+RECIPE_LIST_CACHE_TIMEOUT = int(os.environ.get('RECIPE_LIST_CACHE_TIMEOUT', 0))
+RECIPE_CONDITIONAL_GET = bool(int(os.environ.get('RECIPE_CONDITIONAL_GET', 0)))
+
+RECIPE_BATCH_MAX_SIZE = int(os.environ.get('RECIPE_BATCH_MAX_SIZE', 500))
+RECIPE_EXPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000)
+)
+
+RECIPE_PAGE_SIZE = int(os.environ.get('RECIPE_PAGE_SIZE', 50))
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_MAX_PAGE_SIZE', 200))
+
+# Recipe image renditions, rendered by a thread pool after the upload
+# commits, or inline when the number of workers is 0.
+RECIPE_IMAGE_RENDITION_SIZES = [
+    int(size) for size in os.environ.get(
+        'RECIPE_IMAGE_RENDITION_SIZES', '160,640,1280',
+    ).split(',')
+]
+RECIPE_IMAGE_RENDITION_FORMAT = os.environ.get(
+    'RECIPE_IMAGE_RENDITION_FORMAT', 'WEBP',
+)
+RECIPE_IMAGE_RENDITION_WORKERS = int(
+    os.environ.get('RECIPE_IMAGE_RENDITION_WORKERS', 2)
+)
+
+# Delete replaced and deleted recipe images right away once no recipe
+# uses them. cleanup_images removes whatever is left over either way.
+RECIPE_IMAGE_RELEASE = bool(int(os.environ.get('RECIPE_IMAGE_RELEASE', 1)))
+# Image files modified in the last this many seconds are never deleted,
+# an identical upload may be about to reference them.
+RECIPE_IMAGE_MIN_AGE = int(
+    os.environ.get('RECIPE_IMAGE_MIN_AGE', 24 * 60 * 60)
+)
+
+# Recipe image uploads larger than this many bytes are refused with 413,
+# keep it in line with client_max_body_size in the proxy.
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40_000_000)
+)
+
+# Recipe images are handed to the proxy with X-Accel-Redirect to this
+# internal location, or streamed by Django when it is turned off.
+RECIPE_MEDIA_X_ACCEL = bool(int(
+    os.environ.get('RECIPE_MEDIA_X_ACCEL', int(not DEBUG))
+))
+RECIPE_MEDIA_ACCEL_PREFIX = os.environ.get(
+    'RECIPE_MEDIA_ACCEL_PREFIX', '/protected-media/',
+)
+
+# Matches returned by the tag and ingredient autocomplete, at most
+# RECIPE_MAX_PAGE_SIZE when the client asks for more.
+RECIPE_AUTOCOMPLETE_LIMIT = int(
+    os.environ.get('RECIPE_AUTOCOMPLETE_LIMIT', 10)
+)
+
+# Build recipe, tag and ingredient list responses from values() rows
+# instead of model instances and serializers.
+RECIPE_FAST_LIST = bool(int(os.environ.get('RECIPE_FAST_LIST', 0)))
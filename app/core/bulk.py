@@ -0,0 +1,83 @@
+"""
+Helpers for inserting large numbers of rows.
+"""
+import csv
+import io
+import json
+
+from django.db import connection
+
+COPY_NULL = r'\N'
+
+
+def copy_supported():
+    """Return whether rows can be loaded with PostgreSQL COPY."""
+    return connection.vendor == 'postgresql'
+
+
+def reserve_ids(model, count):
+    """Reserve and return count primary keys from the model's sequence."""
+    if not count:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_value(value):
+    """Return a value as COPY expects it in CSV."""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+
+    return value
+
+
+def copy_rows(model, columns, rows):
+    """Load rows of column values into the model's table with COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} '
+            f'({", ".join(quote(column) for column in columns)}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
+
+
+def insert_rows(model, columns, rows, use_copy):
+    """Insert rows of column values with COPY or bulk_create."""
+    if use_copy:
+        copy_rows(model, columns, rows)
+    else:
+        model.objects.bulk_create(
+            [model(**dict(zip(columns, row))) for row in rows],
+        )
+
+
+def create_rows(model, columns, rows, use_copy):
+    """Insert rows of column values and return their new primary keys."""
+    if use_copy:
+        ids = reserve_ids(model, len(rows))
+        copy_rows(
+            model,
+            [model._meta.pk.column] + columns,
+            [[pk] + list(row) for pk, row in zip(ids, rows)],
+        )
+        return ids
+
+    created = model.objects.bulk_create(
+        [model(**dict(zip(columns, row))) for row in rows],
+    )
+    return [obj.pk for obj in created]
@@ -0,0 +1,361 @@
+"""
+Django command benchmarking the API endpoints.
+"""
+import io
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import (
+    connection,
+    connections,
+)
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+BENCH_PREFIX = 'bench'
+BENCH_PASSWORD = 'benchpass123'
+PERCENTILES = [50, 95, 99]
+RECIPE_SCENARIOS = {'recipe-detail'}
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent * len(values) / 100), 1)
+
+    return values[rank - 1]
+
+
+def summarize(timings, queries, statuses, elapsed):
+    """Return throughput, latency and query statistics of a scenario."""
+    timings = sorted(timings)
+    summary = {
+        'requests': len(timings),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'throughput': round(len(timings) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            f'p{percent}': round(percentile(timings, percent) * 1000, 3)
+            for percent in PERCENTILES
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        },
+    }
+    summary['latency_ms']['mean'] = round(
+        sum(timings) / len(timings) * 1000, 3
+    )
+    summary['latency_ms']['max'] = round(timings[-1] * 1000, 3)
+
+    return summary
+
+
+def _image():
+    """Return a small JPEG file to upload."""
+    file = io.BytesIO()
+    Image.new('RGB', (64, 64), color='orange').save(file, format='JPEG')
+    file.name = 'bench.jpg'
+    file.seek(0)
+
+    return file
+
+
+class Command(BaseCommand):
+    """Django command reporting latency percentiles per endpoint."""
+    help = (
+        'Seed a dataset and report throughput, latency percentiles and '
+        'query counts of the API endpoints as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=100,
+            help='Number of users seeded for the benchmark.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--distribution',
+            choices=['uniform', 'pareto'],
+            default='uniform',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per scenario.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=10,
+            help='Untimed requests per scenario.',
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Only run the named scenario, may be repeated.',
+        )
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Free text stored with the results, e.g. a commit.',
+        )
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        scenarios = self.scenarios()
+        names = options['scenarios'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f'Unknown scenarios: {", ".join(sorted(unknown))}. '
+                f'Choose from {", ".join(scenarios)}.'
+            )
+
+        if options['requests'] < 1:
+            raise CommandError('At least one request is needed.')
+
+        self.users = self._seed(options)
+        hosts = settings.ALLOWED_HOSTS + ['testserver']
+        report = {
+            'label': options['label'],
+            'database': connection.vendor,
+            'users': len(self.users),
+            'concurrency': options['concurrency'],
+            'scenarios': {},
+        }
+        # Renditions are rendered inline, so no worker thread writes into
+        # the real MEDIA_ROOT once the override ends.
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(
+                    ALLOWED_HOSTS=hosts,
+                    MEDIA_ROOT=media_root,
+                    RECIPE_IMAGE_RENDITION_WORKERS=0,
+                    RECIPE_IMAGE_MIN_AGE=0,
+                ):
+            upload_recipes = []
+            if 'upload-image' in names:
+                upload_recipes = self._create_upload_recipes()
+            try:
+                for name in names:
+                    users = self.users
+                    if name in RECIPE_SCENARIOS:
+                        users = [user for user in users if user['recipes']]
+                    if not users:
+                        raise CommandError(f'No user can run {name}.')
+                    report['scenarios'][name] = self._run(
+                        scenarios[name],
+                        users,
+                        options,
+                    )
+                    self.stderr.write(
+                        f'{name}: {report["scenarios"][name]["latency_ms"]}'
+                    )
+            finally:
+                # Deleting them also deletes the uploaded files, as no
+                # minimum age keeps them.
+                Recipe.objects.filter(id__in=upload_recipes).delete()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def _seed(self, options):
+        """Seed benchmark users once and return their fixtures."""
+        prefix = f'{BENCH_PREFIX}-{options["seed"]}-'
+        users = get_user_model().objects.filter(email__startswith=prefix)
+        if users.count() < options['users']:
+            if users.exists():
+                raise CommandError(
+                    f'Found fewer than {options["users"]} users starting '
+                    f'with {prefix}, delete them to seed again.'
+                )
+            self.stderr.write(f'Seeding {options["users"]} users...')
+            call_command(
+                'generate_dataset',
+                users=options['users'],
+                seed=options['seed'],
+                distribution=options['distribution'],
+                email_prefix=BENCH_PREFIX,
+                password=BENCH_PASSWORD,
+                stdout=self.stderr,
+            )
+
+        fixtures = []
+        for user in users.order_by('id')[:options['users']]:
+            token, _ = Token.objects.get_or_create(user=user)
+            fixtures.append({
+                'id': user.id,
+                'email': user.email,
+                'token': token.key,
+                'recipes': list(Recipe.objects.filter(
+                    user=user,
+                ).values_list('id', flat=True)[:100]),
+                'tags': list(Tag.objects.filter(
+                    user=user,
+                ).values_list('id', flat=True)[:100]),
+                'ingredients': list(Ingredient.objects.filter(
+                    user=user,
+                ).values_list('id', flat=True)[:100]),
+            })
+
+        return fixtures
+
+    def _create_upload_recipes(self):
+        """Give every user a throwaway recipe to upload images to.
+
+        Uploading to seeded recipes would leave them pointing at files in
+        the temporary media root. Returns the recipe ids.
+        """
+        for user in self.users:
+            user['upload_recipe'] = Recipe.objects.create(
+                user_id=user['id'],
+                title='Benchmark upload',
+                time_minutes=1,
+                price=Decimal('1.00'),
+            ).id
+
+        return [user['upload_recipe'] for user in self.users]
+
+    def scenarios(self):
+        """Return {name: function(client, user, rng) -> response}."""
+        recipes_url = reverse('recipe:recipe-list')
+        tags_url = reverse('recipe:tag-list')
+        ingredients_url = reverse('recipe:ingredient-list')
+
+        def ids(rng, values, count=2):
+            return ','.join(
+                str(value)
+                for value in rng.sample(values, min(count, len(values)))
+            )
+
+        return {
+            'recipes': lambda client, user, rng: client.get(recipes_url),
+            'recipes-page': lambda client, user, rng: client.get(
+                recipes_url, {'page_size': 50},
+            ),
+            'recipes-tags': lambda client, user, rng: client.get(
+                recipes_url, {'tags': ids(rng, user['tags'])},
+            ),
+            'recipes-tags-all': lambda client, user, rng: client.get(
+                recipes_url,
+                {'tags': ids(rng, user['tags']), 'match': 'all'},
+            ),
+            'recipes-ingredients': lambda client, user, rng: client.get(
+                recipes_url, {'ingredients': ids(rng, user['ingredients'])},
+            ),
+            'recipe-detail': lambda client, user, rng: client.get(
+                reverse(
+                    'recipe:recipe-detail',
+                    args=[rng.choice(user['recipes'])],
+                ),
+            ),
+            'tags': lambda client, user, rng: client.get(tags_url),
+            'tags-assigned': lambda client, user, rng: client.get(
+                tags_url, {'assigned_only': 1},
+            ),
+            'ingredients': lambda client, user, rng: client.get(
+                ingredients_url,
+            ),
+            'ingredients-assigned': lambda client, user, rng: client.get(
+                ingredients_url, {'assigned_only': 1},
+            ),
+            'token': lambda client, user, rng: client.post(
+                reverse('user:token'),
+                {'email': user['email'], 'password': BENCH_PASSWORD},
+            ),
+            'upload-image': lambda client, user, rng: client.post(
+                reverse(
+                    'recipe:recipe-upload-image',
+                    args=[user['upload_recipe']],
+                ),
+                {'image': _image()},
+            ),
+        }
+
+    def _run(self, scenario, users, options):
+        """Drive a scenario from concurrent workers and summarize it."""
+        local = threading.local()
+        lock = threading.Lock()
+        timings, queries, statuses = [], [], []
+
+        def request(index, timed):
+            rng = random.Random(f'{options["seed"]}:{index}')
+            user = rng.choice(users)
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            local.client.defaults['HTTP_AUTHORIZATION'] = (
+                f'Token {user["token"]}'
+            )
+            with CaptureQueriesContext(connections['default']) as context:
+                start = time.perf_counter()
+                response = scenario(local.client, user, rng)
+                elapsed = time.perf_counter() - start
+            if timed:
+                with lock:
+                    timings.append(elapsed)
+                    queries.append(len(context))
+                    statuses.append(response.status_code)
+
+        def worker(indexes, timed):
+            try:
+                for index in indexes:
+                    request(index, timed)
+            finally:
+                connections.close_all()
+
+        concurrency = max(options['concurrency'], 1)
+
+        def run(count, offset, timed):
+            with ThreadPoolExecutor(concurrency) as executor:
+                futures = [
+                    executor.submit(
+                        worker,
+                        range(offset + thread, offset + count, concurrency),
+                        timed,
+                    )
+                    for thread in range(concurrency)
+                ]
+                for future in futures:
+                    future.result()
+
+        run(options['warmup'], 0, False)
+        start = time.perf_counter()
+        run(options['requests'], options['warmup'], True)
+        elapsed = time.perf_counter() - start
+
+        return summarize(timings, queries, statuses, elapsed)
@@ -0,0 +1,110 @@
+"""
+Django command deleting recipe image files no recipe uses.
+"""
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.renditions import (
+    referenced_files,
+    touched_since,
+)
+
+IMAGE_DIR = os.path.join('uploads', 'recipe')
+
+
+def walk_files(root):
+    """Yield (path, stat) of the files below root without listing them."""
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, entry.stat(follow_symlinks=False)
+
+
+class Command(BaseCommand):
+    """Django command reconciling recipe image files with the database."""
+    help = (
+        'Delete files under MEDIA_ROOT/uploads/recipe that are neither a '
+        'recipe image nor one of its renditions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the files that would be deleted.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Files checked against the database per query.',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=2000,
+            help='Maximum files scanned per second, 0 for no limit.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=settings.RECIPE_IMAGE_MIN_AGE,
+            help='Only delete files unchanged for this many seconds, so '
+                 'uploads still in a transaction are kept.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        storage = Recipe._meta.get_field('image').storage
+        location = storage.path('')
+        cutoff = time.time() - options['min_age']
+        dry_run = options['dry_run']
+        totals = {'scanned': 0, 'deleted': 0, 'bytes': 0}
+        start = time.monotonic()
+
+        files = walk_files(storage.path(IMAGE_DIR))
+        while True:
+            batch = list(islice(files, options['batch_size']))
+            if not batch:
+                break
+            totals['scanned'] += len(batch)
+            candidates = {
+                os.path.relpath(path, location).replace(os.sep, '/'): stat
+                for path, stat in batch
+                if stat.st_mtime < cutoff
+            }
+            orphans = set(candidates) - referenced_files(candidates)
+            for name in sorted(orphans):
+                if touched_since(storage.path(name), cutoff):
+                    continue
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'Deleting {name}')
+                if not dry_run:
+                    storage.delete(name)
+                totals['deleted'] += 1
+                totals['bytes'] += candidates[name].st_size
+
+            if options['rate']:
+                ahead = totals['scanned'] / options['rate'] - (
+                    time.monotonic() - start
+                )
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        action = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {totals["deleted"]} of {totals["scanned"]} files '
+            f'({totals["bytes"]} bytes) in '
+            f'{time.monotonic() - start:.2f}s.'
+        ))
@@ -0,0 +1,313 @@
+"""
+Django command generating a synthetic dataset for load testing.
+"""
+import random
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import (
+    connection,
+    transaction,
+)
+
+from core import bulk
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+USER_COLUMNS = [
+    'email', 'name', 'password', 'is_active', 'is_staff', 'is_superuser',
+]
+RECIPE_COLUMNS = [
+    'user_id', 'title', 'description', 'time_minutes', 'price', 'link',
+    'image', 'image_renditions',
+]
+# Generated recipes have no image.
+NO_IMAGE = [
+    Recipe._meta.get_field('image').get_default(),
+    Recipe._meta.get_field('image_renditions').get_default(),
+]
+DISTRIBUTIONS = ['uniform', 'pareto']
+PARETO_ALPHA = 1.5
+
+
+def sample_count(rng, distribution, mean, maximum=None):
+    """Return a random count with the given mean and distribution.
+
+    Uniform counts lie between 0 and twice the mean. Pareto counts have a
+    long tail, so a few users hold many of the rows, and are capped at a
+    hundred times the mean.
+    """
+    if distribution == 'pareto':
+        scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+        count = min(round(scale * rng.paretovariate(PARETO_ALPHA)), 100 * mean)
+    else:
+        count = rng.randint(0, 2 * mean)
+
+    return count if maximum is None else min(count, maximum)
+
+
+def usage_counts(recipes, position):
+    """Return how many planned recipes use each tag or ingredient index."""
+    return Counter(index for recipe in recipes for index in recipe[position])
+
+
+class Command(BaseCommand):
+    """Django command generating users with recipes, tags and ingredients."""
+    help = 'Generate a deterministic synthetic dataset for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=50,
+            help='Mean number of recipes per user.',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=20,
+            help='Mean number of tags per user.',
+        )
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=50,
+            help='Mean number of ingredients per user.',
+        )
+        parser.add_argument(
+            '--tags-per-recipe',
+            type=int,
+            default=3,
+            help='Mean number of tags linked to each recipe.',
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe',
+            type=int,
+            default=8,
+            help='Mean number of ingredients linked to each recipe.',
+        )
+        parser.add_argument(
+            '--distribution',
+            choices=DISTRIBUTIONS,
+            default='uniform',
+            help='Distribution of the per user and per recipe counts.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--email-prefix',
+            default='load',
+            help='Users are named <prefix>-<seed>-<n>@example.com.',
+        )
+        parser.add_argument(
+            '--password',
+            default='loadtest123',
+            help='Password of every generated user.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk inserts even when COPY is available.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.options = options
+        self.use_copy = bulk.copy_supported() and not options['no_copy']
+        features = connection.features
+        if not self.use_copy and not features.can_return_rows_from_bulk_insert:
+            raise CommandError('Database can not return ids of bulk inserts.')
+
+        prefix = f'{options["email_prefix"]}-{options["seed"]}-'
+        if get_user_model().objects.filter(email__startswith=prefix).exists():
+            raise CommandError(
+                f'Users starting with {prefix} exist, use another seed '
+                'or email prefix.'
+            )
+
+        self.prefix = prefix
+        self.password = make_password(options['password'])
+        self.totals = dict.fromkeys(
+            ['users', 'tags', 'ingredients', 'recipes', 'links'], 0
+        )
+        self.pending = []
+        start = time.monotonic()
+
+        batch_size = options['batch_size']
+        for first in range(0, options['users'], batch_size):
+            count = min(batch_size, options['users'] - first)
+            with transaction.atomic():
+                self._generate_users(first, count)
+                self._flush_recipes()
+            elapsed = max(time.monotonic() - start, 1e-9)
+            self.stdout.write(
+                f'Generated {self.totals["users"]} users, '
+                f'{self._rows()} rows ({self._rows() / elapsed:.0f} rows/sec)'
+            )
+
+        elapsed = max(time.monotonic() - start, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' +
+            ', '.join(f'{value} {key}' for key, value in self.totals.items()) +
+            f' in {elapsed:.2f}s: {self._rows() / elapsed:.0f} rows/sec.'
+        ))
+
+    def _rows(self):
+        return sum(self.totals.values())
+
+    def _plan_user(self, number):
+        """Return counts and recipes of a user, from the user's own seed.
+
+        Seeding per user keeps the data independent of the batch size.
+        """
+        rng = random.Random(f'{self.options["seed"]}:{number}')
+
+        def sample(mean, maximum=None):
+            return sample_count(
+                rng, self.options['distribution'], mean, maximum,
+            )
+
+        tags = sample(self.options['tags'])
+        ingredients = sample(self.options['ingredients'])
+        recipes = [
+            (
+                [
+                    f'Recipe {index}',
+                    '',
+                    rng.randint(1, 180),
+                    Decimal(rng.randint(100, 5000)).scaleb(-2),
+                    '',
+                    *NO_IMAGE,
+                ],
+                rng.sample(
+                    range(tags),
+                    sample(self.options['tags_per_recipe'], tags),
+                ),
+                rng.sample(
+                    range(ingredients),
+                    sample(
+                        self.options['ingredients_per_recipe'],
+                        ingredients,
+                    ),
+                ),
+            )
+            for index in range(sample(self.options['recipes']))
+        ]
+
+        return tags, ingredients, recipes
+
+    def _create_names(self, model, user_ids, counts, usages):
+        """Create named objects per user and return their ids per user.
+
+        usages holds the number of recipes using each object of a user,
+        stored as its recipe_count.
+        """
+        label = model._meta.verbose_name.capitalize()
+        rows = [
+            [user_id, f'{label} {index}', usage[index]]
+            for user_id, count, usage in zip(user_ids, counts, usages)
+            for index in range(count)
+        ]
+        ids = iter(bulk.create_rows(
+            model,
+            ['user_id', 'name', 'recipe_count'],
+            rows,
+            self.use_copy,
+        ))
+
+        return [[next(ids) for _ in range(count)] for count in counts]
+
+    def _generate_users(self, first, count):
+        """Generate a batch of users with their names and recipes."""
+        numbers = range(first, first + count)
+        user_ids = bulk.create_rows(
+            get_user_model(),
+            USER_COLUMNS,
+            [
+                [
+                    f'{self.prefix}{number}@example.com',
+                    f'Load user {number}',
+                    self.password,
+                    True,
+                    False,
+                    False,
+                ]
+                for number in numbers
+            ],
+            self.use_copy,
+        )
+        plans = [self._plan_user(number) for number in numbers]
+        tag_ids = self._create_names(
+            Tag,
+            user_ids,
+            [tags for tags, _, _ in plans],
+            [usage_counts(recipes, 1) for _, _, recipes in plans],
+        )
+        ingredient_ids = self._create_names(
+            Ingredient,
+            user_ids,
+            [ingredients for _, ingredients, _ in plans],
+            [usage_counts(recipes, 2) for _, _, recipes in plans],
+        )
+        self.totals['users'] += count
+        self.totals['tags'] += sum(map(len, tag_ids))
+        self.totals['ingredients'] += sum(map(len, ingredient_ids))
+
+        for user_id, tags, ingredients, (_, _, recipes) in zip(
+            user_ids, tag_ids, ingredient_ids, plans,
+        ):
+            for row, tag_indexes, ingredient_indexes in recipes:
+                self.pending.append((
+                    [user_id] + row,
+                    [tags[index] for index in tag_indexes],
+                    [ingredients[index] for index in ingredient_indexes],
+                ))
+                if len(self.pending) >= self.options['batch_size']:
+                    self._flush_recipes()
+
+    def _flush_recipes(self):
+        """Insert pending recipes and their tag and ingredient links."""
+        if not self.pending:
+            return
+        recipe_ids = bulk.create_rows(
+            Recipe,
+            RECIPE_COLUMNS,
+            [row for row, _, _ in self.pending],
+            self.use_copy,
+        )
+        tag_links = [
+            [recipe_id, tag_id]
+            for recipe_id, (_, tags, _) in zip(recipe_ids, self.pending)
+            for tag_id in tags
+        ]
+        ingredient_links = [
+            [recipe_id, ingredient_id]
+            for recipe_id, (_, _, ingredients) in zip(recipe_ids, self.pending)
+            for ingredient_id in ingredients
+        ]
+        bulk.insert_rows(
+            Recipe.tags.through,
+            ['recipe_id', 'tag_id'],
+            tag_links,
+            self.use_copy,
+        )
+        bulk.insert_rows(
+            Recipe.ingredients.through,
+            ['recipe_id', 'ingredient_id'],
+            ingredient_links,
+            self.use_copy,
+        )
+        self.totals['recipes'] += len(self.pending)
+        self.totals['links'] += len(tag_links) + len(ingredient_links)
+        self.pending = []
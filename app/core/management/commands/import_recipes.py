@@ -0,0 +1,243 @@
+"""
+Django command importing recipes from a JSONL or CSV file.
+"""
+import csv
+import json
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import (
+    connection,
+    transaction,
+)
+
+from core import bulk
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.cache import bump_user_version_on_commit
+from recipe.counts import add_recipe_counts
+
+RECIPE_COLUMNS = [
+    'title', 'description', 'time_minutes', 'price', 'link',
+]
+CSV_NAME_SEPARATOR = ';'
+NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def _names(value):
+    """Return names from a list of names or {'name': ...} objects."""
+    if isinstance(value, str):
+        value = value.split(CSV_NAME_SEPARATOR)
+    if not isinstance(value, (list, type(None))):
+        raise ValidationError('Expected a list of names.')
+    names = [
+        item.get('name') if isinstance(item, dict) else item
+        for item in value or []
+    ]
+    if not all(isinstance(name, str) for name in names):
+        raise ValidationError('Expected a list of names.')
+
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def read_jsonl(file):
+    """Yield (line number, record) from a JSONL file.
+
+    Lines holding no JSON object yield None.
+    """
+    for number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+
+
+def read_csv(file):
+    """Yield (line number, record) from a CSV file with a header."""
+    for number, row in enumerate(csv.DictReader(file), start=2):
+        yield number, row
+
+
+class Command(BaseCommand):
+    """Django command importing recipes for a user in bulk."""
+    help = 'Import recipes, tags and ingredients from a JSONL or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL or CSV file to import.')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user owning the imported recipes.',
+        )
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=['jsonl', 'csv'],
+            help='File format, guessed from the extension by default.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk inserts even when COPY is available.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        file_format = options['file_format'] or (
+            'csv' if options['path'].lower().endswith('.csv') else 'jsonl'
+        )
+        reader = read_csv if file_format == 'csv' else read_jsonl
+        use_copy = bulk.copy_supported() and not options['no_copy']
+        features = connection.features
+        if not use_copy and not features.can_return_rows_from_bulk_insert:
+            raise CommandError('Database can not return ids of bulk inserts.')
+
+        self.user = user
+        self.use_copy = use_copy
+        self.name_ids = {Tag: {}, Ingredient: {}}
+        totals = {'recipes': 0, 'links': 0, 'skipped': 0}
+        start = time.monotonic()
+
+        with open(options['path'], newline='', encoding='utf-8') as file:
+            records = reader(file)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    recipes, links, skipped = self._import_batch(batch)
+                    bump_user_version_on_commit(user.id)
+                totals['recipes'] += recipes
+                totals['links'] += links
+                totals['skipped'] += skipped
+                elapsed = max(time.monotonic() - start, 1e-9)
+                self.stdout.write(
+                    f'Imported {totals["recipes"]} recipes '
+                    f'({totals["recipes"] / elapsed:.0f} recipes/sec)'
+                )
+
+        elapsed = max(time.monotonic() - start, 1e-9)
+        rows = totals['recipes'] + totals['links']
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {totals["recipes"]} recipes and '
+            f'{totals["links"]} tag and ingredient links '
+            f'({totals["skipped"]} skipped) in {elapsed:.2f}s: '
+            f'{rows / elapsed:.0f} rows/sec.'
+        ))
+
+    def _resolve(self, model, names):
+        """Return {name: id} for names, creating missing objects."""
+        known = self.name_ids[model]
+        missing = [name for name in names if name not in known]
+        for obj in model.objects.get_or_create_many(self.user, missing):
+            known[obj.name] = obj.id
+
+        return known
+
+    def _import_batch(self, batch):
+        """Insert a batch of records, returning inserted and skipped counts."""
+        recipes = []
+        skipped = 0
+        for number, record in batch:
+            if record is None:
+                self.stderr.write(
+                    f'Skipping line {number}: not a JSON object.'
+                )
+                skipped += 1
+                continue
+            recipe = Recipe(
+                user=self.user,
+                **{
+                    column: record.get(column) or ''
+                    for column in ('title', 'description', 'link')
+                },
+                time_minutes=record.get('time_minutes'),
+                price=record.get('price'),
+            )
+            try:
+                tags = _names(record.get('tags'))
+                ingredients = _names(record.get('ingredients'))
+                recipe.clean_fields(exclude=['user', 'image'])
+                for name in tags + ingredients:
+                    if len(name) > NAME_MAX_LENGTH:
+                        raise ValidationError(f'Name too long: {name!r}.')
+            except ValidationError as error:
+                self.stderr.write(f'Skipping line {number}: {error.messages}')
+                skipped += 1
+                continue
+            recipes.append((recipe, tags, ingredients))
+
+        tag_ids = self._resolve(
+            Tag,
+            list(dict.fromkeys(
+                name for _, tags, _ in recipes for name in tags
+            )),
+        )
+        ingredient_ids = self._resolve(
+            Ingredient,
+            list(dict.fromkeys(
+                name for _, _, ingredients in recipes for name in ingredients
+            )),
+        )
+
+        image = Recipe._meta.get_field('image').get_default()
+        image_renditions = Recipe._meta.get_field(
+            'image_renditions',
+        ).get_default()
+        ids = bulk.create_rows(
+            Recipe,
+            ['user_id', 'image', 'image_renditions'] + RECIPE_COLUMNS,
+            [
+                [self.user.id, image, image_renditions] +
+                [getattr(recipe, column) for column in RECIPE_COLUMNS]
+                for recipe, _, _ in recipes
+            ],
+            self.use_copy,
+        )
+
+        tag_links = [
+            [recipe_id, tag_ids[name]]
+            for recipe_id, (_, tags, _) in zip(ids, recipes)
+            for name in tags
+        ]
+        ingredient_links = [
+            [recipe_id, ingredient_ids[name]]
+            for recipe_id, (_, _, ingredients) in zip(ids, recipes)
+            for name in ingredients
+        ]
+        bulk.insert_rows(
+            Recipe.tags.through,
+            ['recipe_id', 'tag_id'],
+            tag_links,
+            self.use_copy,
+        )
+        bulk.insert_rows(
+            Recipe.ingredients.through,
+            ['recipe_id', 'ingredient_id'],
+            ingredient_links,
+            self.use_copy,
+        )
+        add_recipe_counts('tags', Counter(tag for _, tag in tag_links))
+        add_recipe_counts('ingredients', Counter(
+            ingredient for _, ingredient in ingredient_links
+        ))
+
+        return len(recipes), len(tag_links) + len(ingredient_links), skipped
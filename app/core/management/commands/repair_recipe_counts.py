@@ -0,0 +1,89 @@
+"""
+Django command recomputing the recipe counts of tags and ingredients.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from recipe.counts import COUNTED_FIELDS
+from recipe.rows import relation
+
+
+class Command(BaseCommand):
+    """Django command repairing Tag and Ingredient recipe_count."""
+    help = (
+        'Recompute the recipe_count of every tag and ingredient from the '
+        'recipe relations and fix the ones that drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tags or ingredients recounted per transaction.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the counts that would be fixed.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.monotonic()
+        for field in COUNTED_FIELDS:
+            checked, fixed = 0, 0
+            last_id = 0
+            while True:
+                with transaction.atomic():
+                    ids, batch_fixed = self._repair_batch(
+                        field,
+                        last_id,
+                        options['batch_size'],
+                        options['dry_run'],
+                    )
+                if not ids:
+                    break
+                checked += len(ids)
+                fixed += batch_fixed
+                last_id = ids[-1]
+
+            action = 'Would fix' if options['dry_run'] else 'Fixed'
+            self.stdout.write(self.style.SUCCESS(
+                f'{action} {fixed} of {checked} {field} recipe counts.'
+            ))
+
+        self.stdout.write(f'Done in {time.monotonic() - start:.2f}s.')
+
+    def _repair_batch(self, field, last_id, batch_size, dry_run):
+        """Recount the items after last_id, return their ids and fixes.
+
+        The items are locked first, so recipe changes committing
+        meanwhile wait and then apply their change to the repaired count.
+        """
+        through, column, _, model = relation(field)
+        current = list(
+            model.objects.select_for_update().filter(
+                id__gt=last_id,
+            ).order_by('id').values_list('id', 'recipe_count')[:batch_size]
+        )
+        ids = [pk for pk, _ in current]
+        actual = dict(
+            through.objects.filter(
+                **{f'{column}__in': ids},
+            ).order_by().values(column).annotate(
+                count=Count('*'),
+            ).values_list(column, 'count')
+        )
+        changed = [
+            model(id=pk, recipe_count=actual.get(pk, 0))
+            for pk, count in current
+            if actual.get(pk, 0) != count
+        ]
+        if changed and not dry_run:
+            model.objects.bulk_update(changed, ['recipe_count'])
+
+        return ids, len(changed)
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:48
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (
+        ('Tag', 'tags'),
+        ('Ingredient', 'ingredients'),
+    ):
+        model = apps.get_model('core', model_name)
+        through = Recipe._meta.get_field(field_name).remote_field.through
+        fk = f'{model_name.lower()}_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'),
+            total=Count('id'),
+        ).filter(total__gt=1)
+        for duplicate in duplicates:
+            extra_ids = list(model.objects.filter(
+                user=duplicate['user'],
+                name=duplicate['name'],
+            ).exclude(id=duplicate['keep']).values_list('id', flat=True))
+            recipe_ids = set(through.objects.filter(
+                **{f'{fk}__in': extra_ids}
+            ).values_list('recipe_id', flat=True))
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{fk: duplicate['keep']})
+                    for recipe_id in recipe_ids
+                ],
+                ignore_conflicts=True,
+            )
+            model.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
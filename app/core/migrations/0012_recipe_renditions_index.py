@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:15
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_content_addressed_recipe_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['image_renditions'], name='recipe_renditions_gin_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, "
+    "coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, "
+    "coalesce(description, '')), 'B')"
+)
+
+
+def add_search_vector(apps, schema_editor):
+    """Add the generated tsvector column searched by recipe.search."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE core_recipe ADD COLUMN search_vector tsvector '
+        f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED;'
+    )
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_vector_idx '
+        'ON core_recipe USING gin (search_vector);'
+    )
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE core_recipe DROP COLUMN search_vector;'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_renditions_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
@@ -0,0 +1,52 @@
+import logging
+
+from django.db import (
+    DatabaseError,
+    migrations,
+    transaction,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    ('core_tag', 'tag_name_trgm_idx'),
+    ('core_ingredient', 'ingredient_name_trgm_idx'),
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    """Index names for autocomplete when pg_trgm can be installed."""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    except DatabaseError:
+        logger.warning(
+            'pg_trgm is not available, autocomplete falls back to '
+            'substring matching without an index.'
+        )
+        return
+    for table, index in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {index} ON {table} USING gin (name gin_trgm_ops);'
+        )
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, index in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:28
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    """Fill in the recipe counts of existing tags and ingredients."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for field in ('tags', 'ingredients'):
+        m2m_field = Recipe._meta.get_field(field)
+        through = m2m_field.remote_field.through
+        column = m2m_field.m2m_reverse_name()
+        m2m_field.related_model.objects.update(recipe_count=Coalesce(
+            Subquery(
+                through.objects.filter(
+                    **{column: OuterRef('pk')},
+                ).order_by().values(column).annotate(
+                    count=Count('*'),
+                ).values('count'),
+                output_field=IntegerField(),
+            ),
+            0,
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_attr_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'recipe_count'], name='ingredient_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'recipe_count'], name='tag_user_count_idx'),
+        ),
+    ]
@@ -2,8 +2,8 @@
 Database models.
 """
 import os
-import uuid
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -11,13 +11,17 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from core.storage import recipe_image_storage
+
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image."""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    """Generate file path for new recipe image.
+
+    The storage replaces the name with the hash of the image content.
+    """
+    ext = os.path.splitext(filename)[1].lower()
 
-    return os.path.join('uploads','recipe', filename)
+    return os.path.join('uploads', 'recipe', f'image{ext}')
 
 
 class UserManager(BaseUserManager):
@@ -43,6 +47,32 @@ class UserManager(BaseUserManager):
       return user
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for objects attached to recipes by name."""
+
+    def get_or_create_many(self, user, names):
+        """Return objects for names, creating the missing ones in bulk."""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+
+        found = {
+            obj.name: obj for obj in self.filter(user=user, name__in=names)
+        }
+        missing = [name for name in names if name not in found]
+        if missing:
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            found.update({
+                obj.name: obj
+                for obj in self.filter(user=user, name__in=missing)
+            })
+
+        return [found[name] for name in names]
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """User in the system."""
     email = models.EmailField(max_length=255, unique=True)
@@ -67,8 +97,27 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
-
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage,
+    )
+    image_renditions = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_desc_idx',
+            ),
+            # Counts the recipes sharing a content-addressed image file.
+            models.Index(fields=['image'], name='recipe_image_idx'),
+            # Finds the recipes using a rendition file.
+            GinIndex(
+                fields=['image_renditions'],
+                name='recipe_renditions_gin_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -81,6 +130,24 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
     name = models.CharField(max_length=255)
+    # Number of recipes using the tag, see recipe.counts.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe_count'],
+                name='tag_user_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -92,6 +159,24 @@ class Ingredient(models.Model):
         on_delete= models.CASCADE
     )
     name = models.CharField(max_length=255)
+    # Number of recipes using the ingredient, see recipe.counts.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe_count'],
+                name='ingredient_user_count_idx',
+            ),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
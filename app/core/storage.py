@@ -0,0 +1,60 @@
+"""
+Content-addressed file storage.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Store files under the SHA-256 of their content.
+
+    The hash is computed while the upload is streamed to a temporary
+    file, which is then renamed to <directory>/<hh>/<sha256><ext>. Equal
+    content gets the same name, so it is stored once, and a name never
+    points at different content, so its URL can be cached forever.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """Keep the name, _save derives the final one from the content."""
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = os.path.join(directory, hexdigest[:2], f'{hexdigest}{ext}')
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # Mark the file as in use again for cleanup_images.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                mode = self.file_permissions_mode
+                os.chmod(temp_path, 0o644 if mode is None else mode)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name.replace('\\', '/')
+
+
+recipe_image_storage = ContentAddressedStorage()
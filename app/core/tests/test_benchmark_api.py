@@ -0,0 +1,113 @@
+"""
+Tests for the benchmark_api management command.
+"""
+import json
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import (
+    call_command,
+    CommandError,
+)
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+)
+
+from core.management.commands.benchmark_api import (
+    percentile,
+    summarize,
+)
+from core.models import Recipe
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class BenchmarkApiTests(TransactionTestCase):
+    """Test benchmarking the API.
+
+    Workers use their own database connections, so the seeded data has
+    to be committed.
+    """
+
+    def _benchmark(self, **options):
+        out = StringIO()
+        call_command(
+            'benchmark_api',
+            users=3,
+            requests=6,
+            warmup=1,
+            concurrency=2,
+            stdout=out,
+            stderr=StringIO(),
+            **options,
+        )
+
+        return json.loads(out.getvalue())
+
+    def test_benchmark_report(self):
+        """Test every scenario is reported without errors."""
+        report = self._benchmark(label='abc123')
+
+        self.assertEqual(report['label'], 'abc123')
+        self.assertEqual(report['users'], 3)
+        self.assertIn('upload-image', report['scenarios'])
+        for name, result in report['scenarios'].items():
+            self.assertEqual(result['requests'], 6, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertLessEqual(
+                result['latency_ms']['p50'],
+                result['latency_ms']['p99'],
+            )
+            self.assertGreater(result['queries']['max'], 0, name)
+
+    def test_upload_leaves_seeded_recipes_unchanged(self):
+        """Test images are uploaded to recipes deleted after the run."""
+        self._benchmark(scenario=['tags'])
+        recipes = set(Recipe.objects.values_list('id', 'image'))
+
+        self._benchmark(scenario=['upload-image'])
+
+        self.assertEqual(
+            set(Recipe.objects.values_list('id', 'image')),
+            recipes,
+        )
+
+    def test_benchmark_reuses_seeded_users(self):
+        """Test a second run reuses the seeded dataset."""
+        self._benchmark(scenario=['tags'])
+        count = get_user_model().objects.count()
+
+        report = self._benchmark(scenario=['tags', 'recipes'])
+
+        self.assertEqual(get_user_model().objects.count(), count)
+        self.assertEqual(list(report['scenarios']), ['tags', 'recipes'])
+
+    def test_unknown_scenario(self):
+        """Test unknown scenario names are rejected."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', scenario=['nope'])
+
+
+class SummarizeTests(SimpleTestCase):
+    """Test benchmark statistics."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(percentile(list(range(1, 13)), 95), 12)
+
+    def test_summarize(self):
+        """Test errors, throughput and query statistics."""
+        summary = summarize([0.2, 0.1], [3, 5], [200, 404], 0.5)
+
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throughput'], 4)
+        self.assertEqual(summary['latency_ms']['p50'], 100)
+        self.assertEqual(summary['queries'], {'mean': 4, 'max': 5})
@@ -0,0 +1,102 @@
+"""
+Tests for the cleanup_images management command.
+"""
+import os
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from core.models import Recipe
+
+OLD = time.time() - 2 * 24 * 60 * 60
+
+
+class CleanupImagesTests(TestCase):
+    """Test deleting unused recipe image files."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media_root = media_root.name
+
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        Recipe.objects.create(
+            user=user,
+            title='Soup',
+            time_minutes=5,
+            price=Decimal('1.00'),
+            image='uploads/recipe/aa/used.jpg',
+            image_renditions={'160': 'uploads/recipe/renditions/bb/used.webp'},
+        )
+        self.used = [
+            self._file('uploads/recipe/aa/used.jpg'),
+            self._file('uploads/recipe/renditions/bb/used.webp'),
+            self._file('uploads/recipe/aa/recent.jpg', mtime=time.time()),
+        ]
+        self.unused = [
+            self._file('uploads/recipe/aa/unused.jpg'),
+            self._file('uploads/recipe/old-uuid.png'),
+            self._file('uploads/recipe/renditions/bb/unused.webp'),
+            self._file('uploads/recipe/aa/.upload-abc'),
+        ]
+
+    def _file(self, name, mtime=OLD):
+        """Create a media file last modified at mtime."""
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'data')
+        os.utime(path, (mtime, mtime))
+
+        return path
+
+    def _cleanup(self, **options):
+        out = StringIO()
+        call_command(
+            'cleanup_images',
+            stdout=out,
+            batch_size=2,
+            rate=0,
+            **options,
+        )
+
+        return out.getvalue()
+
+    def test_unused_files_deleted(self):
+        """Test unused old files are deleted and used ones kept."""
+        out = self._cleanup()
+
+        for path in self.used:
+            self.assertTrue(os.path.exists(path), path)
+        for path in self.unused:
+            self.assertFalse(os.path.exists(path), path)
+        self.assertIn('Deleted 4 of 7 files (16 bytes)', out)
+
+    def test_dry_run(self):
+        """Test a dry run deletes nothing."""
+        out = self._cleanup(dry_run=True)
+
+        for path in self.used + self.unused:
+            self.assertTrue(os.path.exists(path), path)
+        self.assertIn('Would delete 4 of 7 files', out)
+
+    def test_min_age(self):
+        """Test files newer than the minimum age are kept."""
+        self._cleanup(min_age=3 * 24 * 60 * 60)
+
+        for path in self.unused:
+            self.assertTrue(os.path.exists(path), path)
@@ -0,0 +1,133 @@
+"""
+Tests for the generate_dataset management command.
+"""
+import random
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import (
+    call_command,
+    CommandError,
+)
+from django.db import connection
+from django.db.models import (
+    Count,
+    F,
+)
+from django.test import TestCase
+
+from core.management.commands.generate_dataset import sample_count
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+def generate(**options):
+    """Run the command and return its output."""
+    out = StringIO()
+    call_command('generate_dataset', stdout=out, **options)
+
+    return out.getvalue()
+
+
+def snapshot():
+    """Return the generated rows in a comparable form."""
+    return (
+        list(get_user_model().objects.order_by('email').values_list(
+            'email', 'password',
+        )),
+        list(Recipe.objects.order_by('user__email', 'title').values_list(
+            'user__email', 'title', 'time_minutes', 'price',
+        )),
+        sorted(Recipe.tags.through.objects.values_list(
+            'recipe__user__email', 'recipe__title', 'tag__name',
+        )),
+    )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class GenerateDatasetTests(TestCase):
+    """Test generating synthetic datasets."""
+
+    def test_generate_dataset(self):
+        """Test users get recipes linked to their own tags and ingredients."""
+        out = generate(users=5, recipes=4, tags=3, ingredients=3, seed=1)
+
+        self.assertEqual(get_user_model().objects.count(), 5)
+        self.assertIn(f'{Recipe.objects.count()} recipes', out)
+        self.assertFalse(Recipe.tags.through.objects.exclude(
+            tag__user=F('recipe__user'),
+        ).exists())
+        self.assertFalse(Recipe.ingredients.through.objects.exclude(
+            ingredient__user=F('recipe__user'),
+        ).exists())
+        self.assertFalse(Recipe.objects.exclude(image=None).exists())
+        user = get_user_model().objects.get(email='load-1-0@example.com')
+        self.assertTrue(user.check_password('loadtest123'))
+
+    def test_recipe_counts(self):
+        """Test tags and ingredients are created with their recipe counts."""
+        generate(users=3, recipes=6, tags=4, ingredients=4, seed=3)
+
+        for model in (Tag, Ingredient):
+            self.assertFalse(model.objects.annotate(
+                actual=Count('recipe'),
+            ).exclude(recipe_count=F('actual')).exists())
+
+    def test_generate_deterministic(self):
+        """Test the same seed generates the same data with either insert."""
+        generate(users=4, recipes=5, tags=4, ingredients=4, seed=7,
+                 batch_size=3)
+        first = snapshot()
+        get_user_model().objects.all().delete()
+
+        generate(users=4, recipes=5, tags=4, ingredients=4, seed=7,
+                 no_copy=True)
+
+        self.assertEqual(snapshot()[1:], first[1:])
+        self.assertEqual(
+            [email for email, _ in snapshot()[0]],
+            [email for email, _ in first[0]],
+        )
+
+    def test_existing_users_rejected(self):
+        """Test generating the same seed twice fails."""
+        generate(users=1, recipes=1, seed=3)
+
+        with self.assertRaises(CommandError):
+            generate(users=1, recipes=1, seed=3)
+
+    def test_names_unique_per_user(self):
+        """Test generated tag and ingredient names do not collide."""
+        generate(users=3, tags=10, ingredients=10, distribution='pareto')
+
+        self.assertEqual(
+            Tag.objects.values('user', 'name').distinct().count(),
+            Tag.objects.count(),
+        )
+        self.assertTrue(Ingredient.objects.exists())
+
+
+class SampleCountTests(TestCase):
+    """Test sampled count distributions."""
+
+    def test_means(self):
+        """Test both distributions roughly keep the requested mean."""
+        rng = random.Random(0)
+        for distribution in ('uniform', 'pareto'):
+            counts = [
+                sample_count(rng, distribution, 10) for _ in range(20000)
+            ]
+
+            self.assertAlmostEqual(sum(counts) / len(counts), 10, delta=2)
+
+    def test_maximum(self):
+        """Test counts never exceed the maximum."""
+        rng = random.Random(0)
+
+        counts = [sample_count(rng, 'pareto', 10, 12) for _ in range(1000)]
+
+        self.assertLessEqual(max(counts), 12)
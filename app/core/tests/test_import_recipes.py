@@ -0,0 +1,210 @@
+"""
+Tests for the import_recipes management command.
+"""
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import (
+    call_command,
+    CommandError,
+)
+from django.db import connection
+from django.test import TestCase
+
+from core.management.commands.import_recipes import Command
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.cache import get_user_version
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class ImportRecipesTests(TestCase):
+    """Test importing recipes in bulk."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def _write(self, content, suffix):
+        """Write content to a temporary file and return its path."""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def _import(self, path, **options):
+        """Run the command and return its standard output and error."""
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes',
+            path,
+            user=self.user.email,
+            stdout=out,
+            stderr=err,
+            **options,
+        )
+
+        return out.getvalue(), err.getvalue()
+
+    def _jsonl(self, records):
+        return self._write(
+            '\n'.join(json.dumps(record) for record in records),
+            '.jsonl',
+        )
+
+    def _check_import(self, **options):
+        path = self._jsonl([
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '5.25',
+                'tags': ['Vegan', {'name': 'Dinner'}],
+                'ingredients': ['Salt'],
+            }
+            for i in range(5)
+        ])
+        version = get_user_version(self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            out, _ = self._import(path, batch_size=2, **options)
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        recipe = recipes.get(title='Recipe 3')
+        self.assertEqual(recipe.price, Decimal('5.25'))
+        self.assertEqual(recipe.description, '')
+        self.assertFalse(recipe.image)
+        self.assertEqual(recipe.image_renditions, {})
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Dinner', 'Vegan'],
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            set(Tag.objects.values_list('recipe_count', flat=True)),
+            {5},
+        )
+        self.assertEqual(Ingredient.objects.get().recipe_count, 5)
+        self.assertIn('Imported 5 recipes and 15', out)
+        self.assertNotEqual(get_user_version(self.user.id), version)
+
+    def test_import_jsonl(self):
+        """Test importing JSONL records in several batches."""
+        self._check_import()
+
+    def test_import_jsonl_without_copy(self):
+        """Test importing with bulk inserts instead of COPY."""
+        self._check_import(no_copy=True)
+
+    def test_import_csv(self):
+        """Test importing CSV rows with separated names."""
+        path = self._write(
+            'title,time_minutes,price,link,tags,ingredients\n'
+            'Soup,20,3.50,https://example.com,Vegan;Lunch,Salt;Water\n',
+            '.csv',
+        )
+
+        self._import(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.link, 'https://example.com')
+        self.assertEqual(recipe.ingredients.count(), 2)
+
+    def test_existing_names_reused(self):
+        """Test existing tags and ingredients are linked, not duplicated."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        path = self._jsonl([
+            {'title': 'Soup', 'time_minutes': 5, 'price': '1.00',
+             'tags': ['Vegan']},
+        ])
+
+        self._import(path)
+
+        self.assertEqual(list(Recipe.objects.get().tags.all()), [tag])
+
+    def test_invalid_rows_skipped(self):
+        """Test invalid rows are reported and skipped."""
+        path = self._jsonl([
+            {'title': 'Good', 'time_minutes': 5, 'price': '1.00'},
+            {'title': '', 'time_minutes': 5, 'price': '1.00'},
+            {'title': 'Bad price', 'time_minutes': 5, 'price': 'abc'},
+            {'title': 'Bad tag', 'time_minutes': 5, 'price': '1.00',
+             'tags': ['x' * 300]},
+        ])
+
+        out, err = self._import(path)
+
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertFalse(Tag.objects.exists())
+        self.assertIn('Skipping line 2', err)
+        self.assertIn('Skipping line 4', err)
+        self.assertIn('(3 skipped)', out)
+
+    def test_malformed_lines_skipped(self):
+        """Test lines that are not JSON objects are reported and skipped."""
+        path = self._write(
+            '{"title": "Good", "time_minutes": 5, "price": "1.00"}\n'
+            '{"title": "Truncated", \n'
+            '[1, 2]\n'
+            '{"title": "Bad tags", "time_minutes": 5, "price": "1.00", '
+            '"tags": [{"id": 1}]}\n'
+            '{"title": "Also good", "time_minutes": 5, "price": "1.00"}\n',
+            '.jsonl',
+        )
+
+        out, err = self._import(path)
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            ['Also good', 'Good'],
+        )
+        self.assertIn('Skipping line 2', err)
+        self.assertIn('Skipping line 3', err)
+        self.assertIn('Skipping line 4', err)
+        self.assertIn('(3 skipped)', out)
+
+    def test_committed_batches_invalidate_cache(self):
+        """Test batches committed before a failure bump the data version."""
+        path = self._jsonl([
+            {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00'}
+            for i in range(4)
+        ])
+        version = get_user_version(self.user.id)
+        import_batch = Command._import_batch
+        calls = []
+
+        def failing_second_batch(command, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('Connection lost.')
+            return import_batch(command, batch)
+
+        with patch.object(Command, '_import_batch', failing_second_batch):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(RuntimeError):
+                    self._import(path, batch_size=2)
+
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_user_version(self.user.id), version)
+
+    def test_unknown_user(self):
+        """Test importing for a missing user fails."""
+        path = self._jsonl([])
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@example.com')
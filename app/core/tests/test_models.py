@@ -1,13 +1,12 @@
 """
 Tests for models.
 """
-from unittest.mock import patch
-import uuid
 
 from decimal import Decimal
 
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 
 from core import models
 
@@ -86,12 +85,38 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ing), ing.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user can not have two tags with the same name."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=other_user, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Vegan')
+
+    def test_get_or_create_many(self):
+        """Test resolving names to existing and new objects in bulk."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        existing = models.Ingredient.objects.create(user=user, name='Salt')
+        models.Ingredient.objects.create(user=other_user, name='Pepper')
+
+        ingredients = models.Ingredient.objects.get_or_create_many(
+            user,
+            ['Salt', 'Pepper', 'Salt'],
+        )
+
+        self.assertEqual([ing.name for ing in ingredients], ['Salt', 'Pepper'])
+        self.assertEqual(ingredients[0], existing)
+        self.assertEqual(ingredients[1].user, user)
+        self.assertEqual(
+            models.Ingredient.objects.filter(name='Pepper').count(),
+            2,
+        )
 
-    @patch('core.models.uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
+    def test_recipe_file_name(self):
         """Test generating image path."""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
-        file_path = models.recipe_image_file_path(None, 'example.jpg')
+        file_path = models.recipe_image_file_path(None, 'example.JPG')
 
-        self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
\ No newline at end of file
+        self.assertEqual(file_path, 'uploads/recipe/image.jpg')
\ No newline at end of file
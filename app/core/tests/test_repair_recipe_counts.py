@@ -0,0 +1,67 @@
+"""
+Tests for the repair_recipe_counts management command.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+class RepairRecipeCountsTests(TestCase):
+    """Test recomputing the recipe counts of tags and ingredients."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tags = [
+            Tag.objects.create(user=user, name=f'Tag {index}')
+            for index in range(3)
+        ]
+        self.ingredient = Ingredient.objects.create(user=user, name='Salt')
+        for index in range(2):
+            recipe = Recipe.objects.create(
+                user=user,
+                title=f'Recipe {index}',
+                time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(*self.tags[:index + 1])
+            recipe.ingredients.add(self.ingredient)
+        Tag.objects.update(recipe_count=7)
+
+    def test_repair(self):
+        """Test drifted counts are fixed in batches."""
+        out = StringIO()
+
+        call_command('repair_recipe_counts', batch_size=2, stdout=out)
+
+        self.assertEqual(
+            [tag.recipe_count for tag in Tag.objects.order_by('id')],
+            [2, 1, 0],
+        )
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.recipe_count, 2)
+        self.assertIn('Fixed 3 of 3 tags', out.getvalue())
+        self.assertIn('Fixed 0 of 1 ingredients', out.getvalue())
+
+    def test_dry_run(self):
+        """Test a dry run reports without fixing."""
+        out = StringIO()
+
+        call_command('repair_recipe_counts', dry_run=True, stdout=out)
+
+        self.assertEqual(
+            set(Tag.objects.values_list('recipe_count', flat=True)),
+            {7},
+        )
+        self.assertIn('Would fix 3 of 3 tags', out.getvalue())
@@ -0,0 +1,49 @@
+"""
+Tests for content-addressed storage.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """Test storing files under their content hash."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def test_name_from_content(self):
+        """Test files are named by the SHA-256 of their content."""
+        digest = hashlib.sha256(b'image').hexdigest()
+
+        name = self.storage.save(
+            'uploads/recipe/image.JPG',
+            ContentFile(b'image'),
+        )
+
+        self.assertEqual(name, f'uploads/recipe/{digest[:2]}/{digest}.jpg')
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'image')
+
+    def test_same_content_stored_once(self):
+        """Test equal uploads share one file."""
+        first = self.storage.save('a/image.jpg', ContentFile(b'same'))
+        second = self.storage.save('a/image.jpg', ContentFile(b'same'))
+        other = self.storage.save('a/image.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        files = [
+            file
+            for _, _, names in os.walk(self.location)
+            for file in names
+        ]
+        self.assertEqual(len(files), 2)
@@ -0,0 +1,80 @@
+"""
+Autocomplete for tag and ingredient names.
+
+With the pg_trgm extension names are matched through GIN trigram
+indexes, as a substring or by word similarity so that typos still
+match. Without it names containing the query are matched. Either way
+prefix matches come first, then similar and frequently used names.
+"""
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    Value,
+    When,
+)
+
+_trigram_support = {}
+
+
+class TrigramMatch(Func):
+    """Whether a value contains a pattern or a word similar to a query."""
+    output_field = BooleanField()
+
+    def as_sql(self, compiler, connection):
+        (column, column_params), (pattern, pattern_params), \
+            (query, query_params) = [
+                compiler.compile(expression)
+                for expression in self.get_source_expressions()
+            ]
+
+        return (
+            f'({column} ILIKE {pattern} OR {column} %%> {query})',
+            [*column_params, *pattern_params, *column_params, *query_params],
+        )
+
+
+class WordSimilarity(Func):
+    """Similarity of a query to the most similar word of a value."""
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+def trigram_supported():
+    """Return whether the database has the pg_trgm extension."""
+    if connection.vendor != 'postgresql':
+        return False
+    if connection.alias not in _trigram_support:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            _trigram_support[connection.alias] = cursor.fetchone() is not None
+
+    return _trigram_support[connection.alias]
+
+
+def autocomplete(queryset, query):
+    """Return the tags or ingredients matching query, best first."""
+    if trigram_supported():
+        pattern = f'%{connection.ops.prep_for_like_query(query)}%'
+        queryset = queryset.filter(
+            TrigramMatch(F('name'), Value(pattern), Value(query)),
+        )
+        similarity = WordSimilarity(Value(query), F('name'))
+    else:
+        queryset = queryset.filter(name__icontains=query)
+        similarity = Value(0.0, output_field=FloatField())
+
+    return queryset.annotate(
+        prefix_match=Case(
+            When(name__istartswith=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        similarity=similarity,
+    ).order_by('-prefix_match', '-similarity', '-recipe_count', 'name')
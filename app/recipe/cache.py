@@ -0,0 +1,233 @@
+"""
+Caching of recipe API responses.
+
+Cached entries are keyed on a per-user data version which signals bump
+on every write to the user's recipes, tags and ingredients, so a new
+version makes all older entries unreachable instead of deleting them.
+The cache named by RECIPE_CACHE_ALIAS must be shared by all workers.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+def _cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'recipe-data-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Return the current data version of a user."""
+    cache = _cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted version never reuses a
+        # number that older cached entries were keyed on.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate everything cached for a user."""
+    cache = _cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_user_version_on_commit(user_id):
+    """Invalidate everything cached for a user once the write commits.
+
+    Bumping earlier lets a concurrent read cache data from before the
+    commit under the new version.
+    """
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+def normalized_query(request):
+    """Return the request query string in a canonical order."""
+    return urlencode(sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    ))
+
+
+def list_cache_key(request, basename):
+    """Return the cache key of a list response for the requesting user."""
+    user_id = request.user.pk
+    digest = hashlib.md5(
+        f'{request.scheme}://{request.get_host()}?'
+        f'{normalized_query(request)}'.encode()
+    ).hexdigest()
+
+    return (
+        f'recipe-list:{basename}:{user_id}:'
+        f'{get_user_version(user_id)}:{digest}'
+    )
+
+
+def response_etag(request):
+    """Return a strong ETag for a response without rendering it.
+
+    The tag depends only on the request and the user's data version, so
+    it changes whenever any data the response could contain changes.
+    """
+    user_id = request.user.pk
+    renderer = getattr(request, 'accepted_media_type', '')
+    digest = hashlib.md5(
+        f'{request.scheme}://{request.get_host()}{request.path}?'
+        f'{normalized_query(request)}:'
+        f'{renderer}:{user_id}:{get_user_version(user_id)}'.encode()
+    ).hexdigest()
+
+    return f'"{digest}"'
+
+
+class NotModified(APIException):
+    """The client already holds the current representation."""
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+    def __init__(self, etag):
+        super().__init__()
+        self.etag = etag
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs from the per-user data version.
+
+    Adds an ETag to list and retrieve responses and returns 304 before
+    any query or serialization when If-None-Match matches. Enabled by
+    RECIPE_CONDITIONAL_GET.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def _etag_enabled(self, request):
+        return (
+            settings.RECIPE_CONDITIONAL_GET and
+            request.method in ('GET', 'HEAD') and
+            self.action in self.conditional_actions
+        )
+
+    def initial(self, request, *args, **kwargs):
+        """Stop with 304 when the client holds the current version."""
+        super().initial(request, *args, **kwargs)
+        if self._etag_enabled(request):
+            self.etag = response_etag(request)
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match:
+                etags = parse_etags(if_none_match)
+                if self.etag in etags:
+                    raise NotModified(self.etag)
+                # * matches any current representation, which a single
+                # object has only once it was found.
+                self.match_any = '*' in etags
+                if self.match_any and not self.detail:
+                    raise NotModified(self.etag)
+
+    def get_object(self):
+        """Stop with 304 for If-None-Match: * once the object is found."""
+        obj = super().get_object()
+        if getattr(self, 'match_any', False):
+            raise NotModified(self.etag)
+
+        return obj
+
+    def handle_exception(self, exc):
+        """Return an empty 304 response for NotModified."""
+        if isinstance(exc, NotModified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': exc.etag},
+            )
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Tag successful conditional responses."""
+        response = super().finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs,
+        )
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+
+        return response
+
+
+class CacheStats:
+    """Thread-safe hit and miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Set the counters back to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self):
+        """Return the counters as a dictionary."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+list_cache_stats = CacheStats()
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user versioned cache.
+
+    Enabled when RECIPE_LIST_CACHE_TIMEOUT is a positive number of
+    seconds.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached list response or build and cache it."""
+        timeout = settings.RECIPE_LIST_CACHE_TIMEOUT
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+
+        cache = _cache()
+        key = list_cache_key(request, self.basename)
+        data = cache.get(key)
+        if data is not None:
+            list_cache_stats.hit()
+            return Response(data)
+
+        list_cache_stats.miss()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+
+        return response
@@ -0,0 +1,51 @@
+"""
+Denormalized recipe counts of tags and ingredients.
+
+Tag.recipe_count and Ingredient.recipe_count are changed in the
+transaction changing the recipe relations: by signal handlers for m2m
+changes and recipe deletes, and explicitly by the bulk insert paths,
+which send no signals. The repair_recipe_counts command recomputes
+them.
+"""
+from collections import defaultdict
+
+from django.db.models import (
+    Count,
+    F,
+    OuterRef,
+    Subquery,
+)
+
+from recipe.rows import relation
+
+COUNTED_FIELDS = ['tags', 'ingredients']
+THROUGH_FIELDS = {relation(field).through: field for field in COUNTED_FIELDS}
+
+
+def add_recipe_counts(field, counts):
+    """Add {id: recipes} to the recipe counts of tags or ingredients.
+
+    Items gaining the same number of recipes share one UPDATE.
+    """
+    model = relation(field).model
+    ids_by_delta = defaultdict(list)
+    for pk, delta in counts.items():
+        if delta:
+            ids_by_delta[delta].append(pk)
+    for delta, ids in ids_by_delta.items():
+        model.objects.filter(id__in=ids).update(
+            recipe_count=F('recipe_count') + delta,
+        )
+
+
+def remove_recipe_counts(field, links):
+    """Subtract through table rows about to be deleted from the counts."""
+    _, column, _, model = relation(field)
+    removed = links.filter(
+        **{column: OuterRef('pk')},
+    ).order_by().values(column).annotate(
+        count=Count('*'),
+    ).values('count')
+    model.objects.filter(id__in=links.values(column)).update(
+        recipe_count=F('recipe_count') - Subquery(removed),
+    )
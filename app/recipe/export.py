@@ -0,0 +1,69 @@
+"""
+Streaming export of recipes.
+"""
+import csv
+import json
+from itertools import islice
+
+from recipe.media import rendition_urls
+from recipe.rows import related_map
+
+RECIPE_FIELDS = [
+    'id', 'title', 'time_minutes', 'price', 'link', 'description',
+]
+CSV_FIELDS = RECIPE_FIELDS + ['tags', 'ingredients']
+CSV_NAME_SEPARATOR = ';'
+
+
+def iter_recipes(queryset, chunk_size):
+    """Yield recipe dicts with tags and ingredients, chunk by chunk.
+
+    Recipes are read through a server-side cursor and relations are
+    loaded with one query per relation and chunk, so memory use depends
+    on chunk_size only.
+    """
+    rows = queryset.values(
+        *RECIPE_FIELDS,
+        'image_renditions',
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        recipe_ids = [row['id'] for row in chunk]
+        tags = related_map('tags', recipe_ids, ['id', 'name'])
+        ingredients = related_map('ingredients', recipe_ids, ['id', 'name'])
+        for row in chunk:
+            row['price'] = str(row['price'])
+            row['tags'] = tags.get(row['id'], [])
+            row['ingredients'] = ingredients.get(row['id'], [])
+            row['image_renditions'] = rendition_urls(
+                row['id'],
+                row['image_renditions'],
+            )
+            yield row
+
+
+def ndjson_lines(recipes):
+    """Yield recipes as newline delimited JSON."""
+    for recipe in recipes:
+        yield json.dumps(recipe) + '\n'
+
+
+class _Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(recipes):
+    """Yield recipes as CSV rows, relations as separated names."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for recipe in recipes:
+        for field in ('tags', 'ingredients'):
+            recipe[field] = CSV_NAME_SEPARATOR.join(
+                item['name'] for item in recipe[field]
+            )
+        yield writer.writerow([recipe[field] for field in CSV_FIELDS])
@@ -0,0 +1,28 @@
+"""
+Recipe counts per tag and ingredient, for filter sidebars.
+"""
+from django.db.models import Count
+
+from recipe.rows import relation
+
+FACET_FIELDS = ['tags', 'ingredients']
+
+
+def facet_counts(recipes, field):
+    """Return [{'id', 'name', 'count'}] of a recipe relation, most used first.
+
+    Counted with one grouped aggregate over the through table of the
+    relation, restricted to the given recipes.
+    """
+    through, column, related, _ = relation(field)
+    name = f'{related}__name'
+    rows = through.objects.filter(
+        recipe_id__in=recipes.order_by().values('id'),
+    ).values(column, name).annotate(
+        count=Count('*'),
+    ).order_by('-count', name).values_list(column, name, 'count')
+
+    return [
+        {'id': related_id, 'name': related_name, 'count': count}
+        for related_id, related_name, count in rows
+    ]
@@ -0,0 +1,109 @@
+"""
+Private delivery of recipe images.
+
+Image URLs point at the recipe image endpoint, which checks ownership
+and hands the file to nginx with X-Accel-Redirect, so the bytes never
+pass through the application workers. Without the proxy, enabled by
+RECIPE_MEDIA_X_ACCEL, the file is streamed by Django instead.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+)
+from django.urls import reverse
+from django.utils.http import parse_etags
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from core.models import Recipe
+
+CACHE_CONTROL = 'private, max-age=31536000, immutable'
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+CONTENT_HASH = re.compile(r'^[0-9a-f]{64}$')
+
+
+def file_digest(name):
+    """Return a digest identifying the content of a stored file.
+
+    Content-addressed names already are the SHA-256 of the content,
+    older uuid names never change content either.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if CONTENT_HASH.match(stem):
+        return stem
+
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def image_url(recipe_id, name, size=None, request=None):
+    """Return the versioned URL of a recipe image or rendition."""
+    params = {'size': size} if size else {}
+    params['v'] = file_digest(name)[:16]
+    url = (
+        f"{reverse('recipe:recipe-image', args=[recipe_id])}"
+        f'?{urlencode(params)}'
+    )
+
+    return request.build_absolute_uri(url) if request else url
+
+
+def rendition_urls(recipe_id, renditions, request=None):
+    """Return {size: url} for the {size: name} renditions of a recipe."""
+    return {
+        size: image_url(recipe_id, name, size, request)
+        for size, name in renditions.items()
+    }
+
+
+def content_type(name):
+    """Return the media type of a stored image file."""
+    ext = os.path.splitext(name)[1].lower()
+
+    return (
+        CONTENT_TYPES.get(ext) or
+        mimetypes.guess_type(name)[0] or
+        'application/octet-stream'
+    )
+
+
+def serve_file(request, name):
+    """Return a response delivering a stored recipe image file."""
+    etag = f'"{file_digest(name)}"'
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    elif settings.RECIPE_MEDIA_X_ACCEL:
+        response = HttpResponse(content_type=content_type(name))
+        response['X-Accel-Redirect'] = (
+            f'{settings.RECIPE_MEDIA_ACCEL_PREFIX}{name}'
+        )
+    else:
+        storage = Recipe._meta.get_field('image').storage
+        response = FileResponse(
+            storage.open(name, 'rb'),
+            content_type=content_type(name),
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+
+    return response
+
+
+class MediaContentNegotiation(DefaultContentNegotiation):
+    """Accept any media type, errors are still rendered as JSON."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -0,0 +1,61 @@
+"""
+Pagination for recipe APIs.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """Keyset pagination used when the client asks for a page.
+
+    Requests without a `cursor` or `page_size` parameter keep receiving
+    the plain unpaginated list.
+    """
+    page_size = settings.RECIPE_PAGE_SIZE
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate queryset only when a page was requested."""
+        params = request.query_params
+        if (self.cursor_query_param not in params and
+                self.page_size_query_param not in params):
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_schema_operation_parameters(self, view):
+        """Describe the cursor as the opaque string it is."""
+        parameters = super().get_schema_operation_parameters(view)
+        for parameter in parameters:
+            if parameter['name'] == self.cursor_query_param:
+                parameter['schema'] = {'type': 'string'}
+
+        return parameters
+
+    def get_paginated_response_schema(self, schema):
+        """Document both the paginated and the plain list response."""
+        return {
+            'oneOf': [
+                super().get_paginated_response_schema(schema),
+                schema,
+            ],
+        }
+
+
+class RecipeCursorPagination(OptionalCursorPagination):
+    """Paginate recipes newest first, search results by rank."""
+    ordering = '-id'
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """Keep search results ordered by their rank."""
+        if 'search_rank' in queryset.query.annotations:
+            return self.search_ordering
+
+        return super().get_ordering(request, queryset, view)
+
+
+class NameCursorPagination(OptionalCursorPagination):
+    """Paginate tags and ingredients by name, unique per user."""
+    ordering = '-name'
@@ -0,0 +1,220 @@
+"""
+Resized renditions of recipe images, generated off the request.
+
+Uploads enqueue the work once their transaction commits and a small
+thread pool renders every size in RECIPE_IMAGE_RENDITION_SIZES. With
+RECIPE_IMAGE_RENDITION_WORKERS set to 0 renditions are generated in
+the calling thread instead.
+"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import (
+    close_old_connections,
+    connection,
+    transaction,
+)
+from PIL import (
+    Image,
+    ImageOps,
+    features,
+)
+
+from core.models import Recipe
+from recipe.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIR = os.path.join('uploads', 'recipe', 'renditions')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.RECIPE_IMAGE_RENDITION_WORKERS,
+                thread_name_prefix='recipe-renditions',
+            )
+
+    return _executor
+
+
+def rendition_name(image_name, size, image_format):
+    """Return the storage name of an image rendition."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+
+    return os.path.join(
+        RENDITION_DIR,
+        f'{stem}-{size}.{image_format.lower()}',
+    )
+
+
+def render(storage, image_name):
+    """Save every rendition of an image and return {size: name}."""
+    image_format = settings.RECIPE_IMAGE_RENDITION_FORMAT
+    if image_format == 'WEBP' and not features.check('webp'):
+        image_format = 'JPEG'
+    sizes = sorted(settings.RECIPE_IMAGE_RENDITION_SIZES, reverse=True)
+    with storage.open(image_name) as file:
+        image = Image.open(file)
+        # Let JPEG decode at a reduced scale when it is still large enough.
+        image.draft('RGB', (sizes[0], sizes[0]))
+        image = ImageOps.exif_transpose(image)
+        alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert(
+            'RGBA' if alpha and image_format == 'WEBP' else 'RGB'
+        )
+
+    renditions = {}
+    # Largest first, so each size is scaled down from the previous one.
+    for size in sizes:
+        image.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=80)
+        renditions[str(size)] = storage.save(
+            rendition_name(image_name, size, image_format),
+            ContentFile(buffer.getvalue()),
+        )
+
+    return renditions
+
+
+def generate_renditions(recipe_id, image_name):
+    """Render an image and attach the renditions to its recipe.
+
+    Renditions already made for the same image by another recipe are
+    reused. Renditions are dropped when the recipe's image changed
+    meanwhile.
+    """
+    try:
+        storage = Recipe._meta.get_field('image').storage
+        renditions = Recipe.objects.filter(
+            image=image_name,
+        ).exclude(
+            image_renditions={},
+        ).values_list('image_renditions', flat=True).first()
+        try:
+            for name in (renditions or {}).values():
+                # Mark the reused files as in use again for cleanup_images.
+                os.utime(storage.path(name))
+        except FileNotFoundError:
+            renditions = None
+        if not renditions:
+            renditions = render(storage, image_name)
+        updated = Recipe.objects.filter(
+            id=recipe_id,
+            image=image_name,
+        ).update(image_renditions=renditions)
+        if not updated:
+            release_image(image_name, renditions)
+            return
+        bump_user_version(
+            Recipe.objects.values_list('user_id', flat=True).get(
+                id=recipe_id,
+            )
+        )
+    except Exception:
+        logger.exception('Rendering image %s failed.', image_name)
+
+
+def referenced_files(names):
+    """Return which of the given storage names a recipe still uses.
+
+    Names are looked up as recipe images through their index and as
+    rendition values through the GIN index on image_renditions.
+    """
+    names = list(names)
+    if not names:
+        return set()
+    referenced = set(Recipe.objects.filter(
+        image__in=names,
+    ).values_list('image', flat=True))
+
+    if connection.vendor == 'postgresql':
+        jsonpath = ' || '.join(
+            f'$.* == {json.dumps(name)}' for name in names
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT DISTINCT renditions.value '
+                'FROM core_recipe, '
+                'jsonb_each_text(core_recipe.image_renditions) renditions '
+                'WHERE core_recipe.image_renditions @@ %s::jsonpath '
+                'AND renditions.value = ANY(%s)',
+                [jsonpath, names],
+            )
+            referenced.update(row[0] for row in cursor.fetchall())
+    else:
+        wanted = set(names)
+        for renditions in Recipe.objects.exclude(
+            image_renditions={},
+        ).values_list('image_renditions', flat=True).iterator():
+            referenced.update(wanted.intersection(renditions.values()))
+
+    return referenced
+
+
+def touched_since(path, cutoff):
+    """Return whether a file was modified at or after cutoff, or removed.
+
+    Storing content that already exists touches the file, so this holds
+    for files an upload still in a transaction is about to reference.
+    """
+    try:
+        return os.stat(path).st_mtime >= cutoff
+    except FileNotFoundError:
+        return True
+
+
+def release_image(image_name, renditions):
+    """Delete an image and its renditions unless a recipe still uses them.
+
+    Files are named by content, so recipes can share an image and its
+    renditions. Files modified in the last RECIPE_IMAGE_MIN_AGE seconds
+    are kept for cleanup_images to collect.
+    """
+    if not settings.RECIPE_IMAGE_RELEASE or not image_name:
+        return
+    cutoff = time.time() - settings.RECIPE_IMAGE_MIN_AGE
+    names = [image_name, *renditions.values()]
+    storage = Recipe._meta.get_field('image').storage
+    for name in set(names) - referenced_files(names):
+        if not touched_since(storage.path(name), cutoff):
+            storage.delete(name)
+
+
+def _work(recipe_id, image_name):
+    """Generate renditions in a worker thread with its own connection."""
+    close_old_connections()
+    try:
+        generate_renditions(recipe_id, image_name)
+    finally:
+        close_old_connections()
+
+
+def enqueue_renditions(recipe):
+    """Generate renditions of a recipe's image after the commit."""
+    recipe_id, image_name = recipe.id, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_RENDITION_WORKERS:
+            _get_executor().submit(
+                _work,
+                recipe_id,
+                image_name,
+            )
+        else:
+            generate_renditions(recipe_id, image_name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,164 @@
+"""
+List responses built straight from values() rows.
+
+With RECIPE_FAST_LIST, list endpoints read values() rows and one map
+per related field instead of model instances, and render them with the
+fields of the view's serializer, skipping the per-object serializer
+machinery. Responses are the same as the serializers produce.
+"""
+from collections import namedtuple
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.models import Recipe
+
+Relation = namedtuple('Relation', ['through', 'column', 'related', 'model'])
+
+
+def relation(field):
+    """Return the through table of a recipe relation and how to join it.
+
+    Through rows hold the recipe in recipe_id and the related object in
+    column; related names their foreign key for lookups across it.
+    """
+    m2m_field = Recipe._meta.get_field(field)
+
+    return Relation(
+        through=m2m_field.remote_field.through,
+        column=m2m_field.m2m_reverse_name(),
+        related=m2m_field.m2m_reverse_field_name(),
+        model=m2m_field.related_model,
+    )
+
+
+def related_map(field, recipe_ids, names=None):
+    """Return {recipe_id: [related]} for a recipe relation, ordered by id.
+
+    Related objects are dicts of the given field names, or their IDs
+    when no names are given.
+    """
+    through, column, related, _ = relation(field)
+    lookups = [
+        column if name == 'id' else f'{related}__{name}'
+        for name in names or ['id']
+    ]
+    rows = through.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).order_by(column).values_list('recipe_id', *lookups)
+
+    related_by_id = {}
+    for recipe_id, *values in rows:
+        related_by_id.setdefault(recipe_id, []).append(
+            dict(zip(names, values)) if names else values[0]
+        )
+
+    return related_by_id
+
+
+def _decimal_renderer(field):
+    """Render decimals like DecimalField without requantizing them."""
+    exponent = -field.decimal_places
+    as_string = getattr(
+        field,
+        'coerce_to_string',
+        api_settings.COERCE_DECIMAL_TO_STRING,
+    ) and not field.localize
+
+    def render(value):
+        if (as_string and isinstance(value, Decimal) and
+                value.as_tuple().exponent == exponent):
+            return f'{value:f}'
+        return field.to_representation(value)
+
+    return render
+
+
+def _field_renderer(serializer, field, rows):
+    """Return a function rendering a field from a values() row."""
+    model = serializer.Meta.model
+    if isinstance(field, serializers.SerializerMethodField):
+        method = getattr(serializer, field.method_name)
+        return lambda row: method(SimpleNamespace(**row))
+
+    model_field = model._meta.get_field(field.source)
+    if model_field.many_to_many:
+        names = None
+        if isinstance(field, serializers.ListSerializer):
+            names = list(field.child.fields)
+        related = related_map(
+            field.source,
+            [row['id'] for row in rows],
+            names,
+        )
+        return lambda row: related.get(row['id'], [])
+
+    source = field.source
+    if isinstance(field, serializers.DecimalField):
+        render_decimal = _decimal_renderer(field)
+        return lambda row: render_decimal(row[source])
+    if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+        kind = str if isinstance(field, serializers.CharField) else int
+
+        def render_value(row):
+            value = row[source]
+            if type(value) is kind:
+                return value
+            return None if value is None else field.to_representation(value)
+        return render_value
+
+    return lambda row: field.to_representation(row[source])
+
+
+def row_columns(serializer):
+    """Return the model columns read by the fields of a serializer."""
+    model = serializer.Meta.model
+    columns = ['id']
+    for field in serializer.fields.values():
+        name = field.field_name
+        if isinstance(field, serializers.SerializerMethodField):
+            columns.append(name)
+        elif not model._meta.get_field(field.source).many_to_many:
+            columns.append(field.source)
+
+    return list(dict.fromkeys(columns))
+
+
+def rows_data(serializer, rows):
+    """Return the serializer's representation of values() rows."""
+    renderers = [
+        (name, _field_renderer(serializer, field, rows))
+        for name, field in serializer.fields.items()
+    ]
+
+    return [{name: render(row) for name, render in renderers} for row in rows]
+
+
+class RowListMixin:
+    """Build list responses from values() rows.
+
+    Enabled by RECIPE_FAST_LIST. Rows also carry the columns the
+    queryset is ordered by, which cursor pagination reads.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Return the list rendered from values() rows."""
+        if not settings.RECIPE_FAST_LIST:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [name.lstrip('-') for name in queryset.query.order_by]
+        rows = queryset.prefetch_related(None).values(
+            *dict.fromkeys(row_columns(serializer) + ordering)
+        )
+        page = self.paginate_queryset(rows)
+        data = rows_data(serializer, list(rows) if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
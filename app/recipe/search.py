@@ -0,0 +1,109 @@
+"""
+Full-text search over recipe titles and descriptions.
+
+On PostgreSQL recipes are matched against their search_vector column,
+a generated tsvector weighting titles above descriptions with a GIN
+index, and ranked with ts_rank. The column is maintained by the
+database, so every write path keeps it current. Other databases fall
+back to matching the terms of the same query syntax as substrings,
+without stemming.
+"""
+import operator
+import re
+import string
+from functools import reduce
+
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    IntegerField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.expressions import RawSQL
+
+# Must match the configuration of the generated column. The column is
+# not a model field and is referenced unqualified, no other table joined
+# to recipes has a column of that name.
+SEARCH_CONFIG = 'english'
+# ts_rank is a float, ranks are scaled to integers so that page cursors
+# compare them exactly.
+RANK_SCALE = 1000000
+# A word or a "quoted phrase", prefixed with - to exclude it.
+TOKEN_RE = re.compile(
+    r'(?P<negated>-?)(?:"(?P<phrase>[^"]*)"?|(?P<word>[^\s"]+))'
+)
+
+
+def parse_websearch(query):
+    """Parse query with the syntax of websearch_to_tsquery.
+
+    Returns the clauses all matches satisfy, each a list of alternative
+    (negated, text) terms: words and "quoted phrases" are required, OR
+    between two of them makes them alternatives and a leading - negates
+    one.
+    """
+    clauses = []
+    alternative = False
+    for match in TOKEN_RE.finditer(query):
+        negated, phrase, word = match.group('negated', 'phrase', 'word')
+        if word is not None and word.lower() == 'or' and not negated:
+            alternative = bool(clauses)
+            continue
+        text = phrase.strip() if phrase is not None else word.strip(
+            string.punctuation,
+        )
+        if not text:
+            continue
+        if alternative:
+            clauses[-1].append((bool(negated), text))
+        else:
+            clauses.append([(bool(negated), text)])
+        alternative = False
+
+    return clauses
+
+
+def _term_filter(text):
+    return Q(title__icontains=text) | Q(description__icontains=text)
+
+
+def search_recipes(queryset, query):
+    """Return the recipes matching query, annotated with search_rank."""
+    if connection.vendor == 'postgresql':
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        params = [SEARCH_CONFIG, query]
+        return queryset.filter(RawSQL(
+            f'search_vector @@ {tsquery}',
+            params,
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'(ts_rank(search_vector, {tsquery}) '
+            f'* {RANK_SCALE})::integer',
+            params,
+            output_field=IntegerField(),
+        ))
+
+    terms = []
+    for clause in parse_websearch(query):
+        if len(clause) == 1 and clause[0][0]:
+            queryset = queryset.exclude(_term_filter(clause[0][1]))
+            continue
+        queryset = queryset.filter(reduce(operator.or_, [
+            ~_term_filter(term) if negated else _term_filter(term)
+            for negated, term in clause
+        ]))
+        terms += [term for negated, term in clause if not negated]
+    rank = Value(0, output_field=IntegerField())
+    for term in terms:
+        # Title matches rank above description matches.
+        rank += Case(
+            When(title__icontains=term, then=Value(2)),
+            When(description__icontains=term, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    return queryset.annotate(search_rank=rank)
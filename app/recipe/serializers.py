@@ -1,6 +1,10 @@
 """
 Serializers for recipe API.
 """
+from collections import Counter
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.models import (
@@ -8,9 +12,38 @@ from core.models import (
     Tag,
     Ingredient,
 )
+from recipe.cache import bump_user_version_on_commit
+from recipe.counts import add_recipe_counts
+from recipe.media import rendition_urls
+from recipe.uploads import RecipeImageField
+
+
+class UniqueNameMixin:
+    """Reject names the requesting user already has on another object.
+
+    Nested in a recipe, names refer to existing objects and are not
+    validated.
+    """
+
+    def validate_name(self, name):
+        if self.root is not self:
+            return name
+        others = self.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name=name,
+        )
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f'You already have a {self.Meta.model._meta.verbose_name} '
+                'with this name.'
+            )
+
+        return name
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for tag."""
 
     class Meta:
@@ -19,7 +52,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for ingredient"""
 
     class Meta:
@@ -30,7 +63,98 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Serializer taking the fields to render and the relations to nest.
+
+    Only the fields named in `fields` are kept, all by default. Related
+    fields named in `unexpanded` are rendered as lists of IDs.
+    """
+
+    def __init__(self, *args, fields=None, unexpanded=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in unexpanded:
+            if name in self.fields:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=True,
+                    read_only=True,
+                )
+
+
+class ImageRenditionsMixin(serializers.Serializer):
+    """Expose the URLs of ready image renditions by size."""
+    image_renditions = serializers.SerializerMethodField()
+
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_image_renditions(self, recipe):
+        return rendition_urls(
+            recipe.id,
+            recipe.image_renditions,
+            self.context.get('request'),
+        )
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer creating many recipes with bulk queries."""
+
+    def create(self, validated_data):
+        """Create and return recipes with their tags and ingredients."""
+        user = self.context['request'].user
+        items = [dict(item) for item in validated_data]
+        tags = {
+            tag.name: tag for tag in Tag.objects.get_or_create_many(
+                user,
+                [
+                    tag['name']
+                    for item in items
+                    for tag in item.get('tags', [])
+                ],
+            )
+        }
+        ingredients = {
+            ing.name: ing for ing in Ingredient.objects.get_or_create_many(
+                user,
+                [
+                    ing['name']
+                    for item in items
+                    for ing in item.get('ingredients', [])
+                ],
+            )
+        }
+        item_tags = [item.pop('tags', []) for item in items]
+        item_ingredients = [item.pop('ingredients', []) for item in items]
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**item) for item in items]
+        )
+
+        tag_links = Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag=tags[name])
+            for recipe, names in zip(recipes, item_tags)
+            for name in dict.fromkeys(tag['name'] for tag in names)
+        ])
+        ingredient_links = Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe=recipe,
+                ingredient=ingredients[name],
+            )
+            for recipe, names in zip(recipes, item_ingredients)
+            for name in dict.fromkeys(ing['name'] for ing in names)
+        ])
+        # Bulk inserts send no signals.
+        add_recipe_counts('tags', Counter(link.tag_id for link in tag_links))
+        add_recipe_counts('ingredients', Counter(
+            link.ingredient_id for link in ingredient_links
+        ))
+        bump_user_version_on_commit(user.id)
+
+        return recipes
+
+
+class RecipeSerializer(SparseFieldsMixin,
+                       ImageRenditionsMixin,
+                       serializers.ModelSerializer):
     """Serializer for recipe."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -39,27 +163,24 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = [
             'id', 'title','time_minutes', 'price', 'link', 'tags',
-            'ingredients'
+            'ingredients', 'image_renditions'
             ]
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags):
         """Handle getting or creating tags as needed."""
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=self.context['request'].user,
-                name=tag['name']
-            )
-            recipe.tags.add(tag_obj)
+        return Tag.objects.get_or_create_many(
+            self.context['request'].user,
+            [tag['name'] for tag in tags],
+        )
 
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _get_or_create_ingredients(self, ingredients):
         """Handle getting or creating ingredients as needed."""
-        for ingredient in ingredients:
-            ing_obj, created = Ingredient.objects.get_or_create(
-                user=self.context['request'].user,
-                name=ingredient['name'],
-            )
-            recipe.ingredients.add(ing_obj)
+        return Ingredient.objects.get_or_create_many(
+            self.context['request'].user,
+            [ingredient['name'] for ingredient in ingredients],
+        )
 
 
     def create(self, validated_data):
@@ -67,27 +188,35 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        recipe.tags.add(*self._get_or_create_tags(tags))
+        recipe.ingredients.add(*self._get_or_create_ingredients(ingredients))
 
         return recipe
 
     def update(self, instance, validated_data):
-        """SUpdate and return recipe with tag."""
+        """Update and return recipe with tags.
+
+        Related tags and ingredients are diffed against the current ones,
+        so only added or removed items touch the through tables.
+        """
         tags = validated_data.pop('tags', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_tags(tags))
         ingredients = validated_data.pop('ingredients', None)
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
-
+            instance.ingredients.set(
+                self._get_or_create_ingredients(ingredients)
+            )
 
         for attr, val in validated_data.items():
             setattr(instance, attr, val)
 
-        instance.save()
+        # Only write the submitted columns, so an edit never overwrites
+        # renditions stored meanwhile by the image workers.
+        instance.save(update_fields=[
+            attr for attr in validated_data
+            if attr not in ('image', 'image_renditions')
+        ])
         return instance
 
 
@@ -97,13 +226,14 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['description']
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(ImageRenditionsMixin,
+                            serializers.ModelSerializer):
     """Serializer for upload images."""
+    image = RecipeImageField(required=True)
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_renditions']
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': 'True'}}
 
 
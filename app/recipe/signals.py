@@ -0,0 +1,85 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.cache import bump_user_version_on_commit
+from recipe.counts import (
+    COUNTED_FIELDS,
+    THROUGH_FIELDS,
+    add_recipe_counts,
+    remove_recipe_counts,
+)
+from recipe.renditions import release_image
+from recipe.rows import relation
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_version_on_write(sender, instance, **kwargs):
+    """Invalidate cached responses of the owner of a changed object."""
+    bump_user_version_on_commit(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_version_on_m2m_change(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe relations change."""
+    if action.startswith('post_'):
+        bump_user_version_on_commit(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts_on_m2m_change(sender, instance, action, reverse,
+                                       pk_set, **kwargs):
+    """Count the recipes of added and removed tags and ingredients."""
+    field = THROUGH_FIELDS[sender]
+    through, column, _, _ = relation(field)
+    if action == 'post_add':
+        if reverse:
+            add_recipe_counts(field, {instance.pk: len(pk_set)})
+        else:
+            add_recipe_counts(field, dict.fromkeys(pk_set, 1))
+    elif action in ('pre_remove', 'pre_clear'):
+        own, other = 'recipe_id', column
+        if reverse:
+            own, other = other, own
+        links = through.objects.filter(**{own: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{other}__in': pk_set})
+        remove_recipe_counts(field, links)
+
+
+@receiver(pre_delete, sender=Recipe)
+def update_recipe_counts_on_delete(sender, instance, **kwargs):
+    """Uncount a deleted recipe from its tags and ingredients."""
+    for field in COUNTED_FIELDS:
+        remove_recipe_counts(
+            field,
+            relation(field).through.objects.filter(recipe_id=instance.pk),
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image_on_delete(sender, instance, **kwargs):
+    """Delete the image of a deleted recipe once no recipe uses it."""
+    if instance.image:
+        name, renditions = instance.image.name, instance.image_renditions
+        transaction.on_commit(lambda: release_image(name, renditions))
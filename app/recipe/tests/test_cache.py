@@ -0,0 +1,293 @@
+"""
+Tests for cached recipe API responses.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tag,
+    Ingredient,
+)
+from recipe.cache import (
+    bump_user_version,
+    get_user_version,
+    list_cache_stats,
+)
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class UserVersionTests(TestCase):
+    """Test per-user data versions."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def test_version_stable_until_bumped(self):
+        """Test the version only changes when bumped."""
+        version = get_user_version(self.user.id)
+
+        self.assertEqual(get_user_version(self.user.id), version)
+        bump_user_version(self.user.id)
+        self.assertNotEqual(get_user_version(self.user.id), version)
+
+    def test_writes_bump_version(self):
+        """Test saves, deletes and relation changes bump the version."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        changes = [
+            lambda: recipe.save(),
+            lambda: recipe.tags.add(tag),
+            lambda: recipe.ingredients.add(ingredient),
+            lambda: tag.recipe_set.clear(),
+            lambda: ingredient.delete(),
+            lambda: recipe.delete(),
+        ]
+        for change in changes:
+            version = get_user_version(self.user.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertNotEqual(get_user_version(self.user.id), version)
+
+    def test_version_bumped_on_commit(self):
+        """Test a write bumps the version only once it commits."""
+        version = get_user_version(self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user)
+            self.assertEqual(get_user_version(self.user.id), version)
+
+        self.assertNotEqual(get_user_version(self.user.id), version)
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=60)
+class CachedListTests(TestCase):
+    """Test cached list responses."""
+
+    def setUp(self):
+        cache.clear()
+        list_cache_stats.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test an unchanged list is served without queries."""
+        create_recipe(self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(list_cache_stats.snapshot(), {'hits': 1, 'misses': 1})
+
+    def test_list_not_stale_after_write(self):
+        """Test writes are visible on the next read."""
+        self.client.get(RECIPES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                RECIPES_URL,
+                {'title': 'New', 'time_minutes': 5, 'price': '1.00'},
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_not_stale_after_relation_change(self):
+        """Test tag changes are visible on the next read."""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(RECIPES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            res.data[0]['tags'],
+            [{'id': tag.id, 'name': 'Vegan'}],
+        )
+
+    def test_query_string_normalized(self):
+        """Test parameter order does not change the cache entry."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.client.get(
+            f'{RECIPES_URL}?tags={tag.id}&ingredients={ingredient.id}'
+        )
+        self.client.get(
+            f'{RECIPES_URL}?ingredients={ingredient.id}&tags={tag.id}'
+        )
+
+        self.assertEqual(list_cache_stats.snapshot(), {'hits': 1, 'misses': 1})
+
+    def test_cache_separated_per_user(self):
+        """Test users never see each other's cached lists."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(other)
+        self.client.get(RECIPES_URL)
+
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(list_cache_stats.snapshot()['hits'], 0)
+
+    def test_cache_separated_per_scheme(self):
+        """Test http and https lists, holding absolute URLs, are apart."""
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, secure=True)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list_cache_stats.snapshot(), {'hits': 0, 'misses': 2})
+
+    def test_tag_and_ingredient_lists_cached(self):
+        """Test tag and ingredient lists are cached and invalidated."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        self.client.get(INGREDIENTS_URL)
+
+        with self.assertNumQueries(0):
+            self.client.get(TAGS_URL)
+            self.client.get(INGREDIENTS_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(user=self.user, name='Salt')
+        res = self.client.get(INGREDIENTS_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+
+@override_settings(RECIPE_CONDITIONAL_GET=True)
+class ConditionalGetTests(TestCase):
+    """Test ETags and conditional GET requests."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list returns 304 without queries."""
+        res = self.client.get(RECIPES_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_detail_not_modified(self):
+        """Test an unchanged recipe detail returns 304."""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_after_write(self):
+        """Test a write makes the previous ETag stale."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        self.recipe.title = 'Changed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.save()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data[0]['title'], 'Changed')
+
+    def test_etag_differs_per_query_and_resource(self):
+        """Test ETags differ between filters and endpoints."""
+        etags = {
+            self.client.get(RECIPES_URL)['ETag'],
+            self.client.get(RECIPES_URL, {'tags': '1'})['ETag'],
+            self.client.get(TAGS_URL)['ETag'],
+            self.client.get(INGREDIENTS_URL)['ETag'],
+        }
+
+        self.assertEqual(len(etags), 4)
+
+    def test_etag_differs_per_user(self):
+        """Test another user's ETag does not match."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_recipe_not_tagged(self):
+        """Test error responses carry no ETag."""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id + 1])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
+
+    def test_match_any_requires_recipe(self):
+        """Test If-None-Match: * answers 304 only for an existing recipe."""
+        other = create_recipe(
+            get_user_model().objects.create_user(
+                email='other@example.com',
+                password='testpass123',
+            ),
+        )
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        for recipe_id in (other.id, other.id + 1):
+            url = reverse('recipe:recipe-detail', args=[recipe_id])
+            res = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertNotIn('ETag', res)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
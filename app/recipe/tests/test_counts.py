@@ -0,0 +1,121 @@
+"""
+Tests for the recipe counts of tags and ingredients.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.tests.test_recipe_api import create_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BATCH_URL = reverse('recipe:recipe-batch')
+
+
+class RecipeCountTests(TestCase):
+    """Test recipe counts follow recipe changes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+
+    def assertCounts(self, model, expected):
+        self.assertEqual(
+            dict(model.objects.values_list('name', 'recipe_count')),
+            expected,
+        )
+
+    def test_add_and_remove(self):
+        """Test adding and removing tags of recipes."""
+        r1 = create_recipe(self.user)
+        r2 = create_recipe(self.user)
+        r1.tags.add(self.vegan, self.quick)
+        r2.tags.add(self.vegan)
+        r2.tags.add(self.vegan)
+        self.assertCounts(Tag, {'Vegan': 2, 'Quick': 1})
+
+        r1.tags.remove(self.vegan)
+        r2.tags.remove(self.quick)
+        self.assertCounts(Tag, {'Vegan': 1, 'Quick': 1})
+
+        r1.tags.clear()
+        self.assertCounts(Tag, {'Vegan': 1, 'Quick': 0})
+
+    def test_reverse_add_and_clear(self):
+        """Test changing the recipes of a tag."""
+        r1 = create_recipe(self.user)
+        r2 = create_recipe(self.user)
+        self.vegan.recipe_set.add(r1, r2)
+        self.assertCounts(Tag, {'Vegan': 2, 'Quick': 0})
+
+        self.vegan.recipe_set.remove(r1)
+        self.assertCounts(Tag, {'Vegan': 1, 'Quick': 0})
+
+        self.vegan.recipe_set.clear()
+        self.assertCounts(Tag, {'Vegan': 0, 'Quick': 0})
+
+    def test_delete_recipe(self):
+        """Test deleting recipes uncounts them."""
+        r1 = create_recipe(self.user)
+        r2 = create_recipe(self.user)
+        r1.tags.add(self.vegan, self.quick)
+        r2.tags.add(self.vegan)
+
+        r1.delete()
+        self.assertCounts(Tag, {'Vegan': 1, 'Quick': 0})
+
+        Recipe.objects.all().delete()
+        self.assertCounts(Tag, {'Vegan': 0, 'Quick': 0})
+
+    def test_api_update(self):
+        """Test replacing tags and ingredients through the API."""
+        payload = {
+            'title': 'Curry',
+            'time_minutes': 30,
+            'price': Decimal('5.00'),
+            'tags': [{'name': 'Vegan'}],
+            'ingredients': [{'name': 'Rice'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        self.client.patch(
+            reverse('recipe:recipe-detail', args=[res.data['id']]),
+            {'tags': [{'name': 'Quick'}], 'ingredients': []},
+            format='json',
+        )
+
+        self.assertCounts(Tag, {'Vegan': 0, 'Quick': 1})
+        self.assertCounts(Ingredient, {'Rice': 0})
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_batch_create(self):
+        """Test recipes created in bulk are counted."""
+        item = {
+            'title': 'Salad',
+            'time_minutes': 5,
+            'price': '3.00',
+            'tags': [{'name': 'Vegan'}, {'name': 'Vegan'}],
+            'ingredients': [{'name': 'Lettuce'}],
+        }
+
+        res = self.client.post(BATCH_URL, [item, item], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(Tag, {'Vegan': 2, 'Quick': 0})
+        self.assertCounts(Ingredient, {'Lettuce': 2})
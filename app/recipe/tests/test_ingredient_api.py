@@ -12,6 +12,7 @@ from core.models import (
     Ingredient,
     Recipe,
     )
+from recipe.autocomplete import trigram_supported
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
@@ -84,6 +85,46 @@ class PrivatIngredientApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_update_ingredient_duplicate_name(self):
+        """Test renaming an ingredient to a name in use returns an error."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Oil')
+        Ingredient.objects.create(user=self.user, name='Butter')
+
+        for method in (self.client.patch, self.client.put):
+            res = method(
+                detail_url(ingredient.id),
+                {'name': 'Butter'},
+                format='json',
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('name', res.data)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'Oil')
+
+    def test_update_ingredient_same_name(self):
+        """Test an ingredient can be saved under its own name."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Oil')
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Ingredient.objects.create(user=other_user, name='Butter')
+
+        res = self.client.put(
+            detail_url(ingredient.id),
+            {'name': 'Oil'},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.patch(
+            detail_url(ingredient.id),
+            {'name': 'Butter'},
+            format='json',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_ingredients(self):
         """Test deleting ingredient."""
         ingredient = Ingredient.objects.create(user=self.user, name='Sugar')
@@ -137,3 +178,46 @@ class PrivatIngredientApiTest(TestCase):
         params = {'assigned_only': 1}
         res = self.client.get(INGREDIENTS_URL, params)
         self.assertEqual(len(res.data), 1)
+
+    def test_list_paginated_with_cursor(self):
+        """Test walking the ingredients list page by page."""
+        names = ['A', 'B', 'C', 'D', 'E']
+        for name in names:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_URL, {'page_size': 2})
+        result = [item['name'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            result += [item['name'] for item in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(result, sorted(names, reverse=True))
+
+    def test_autocomplete(self):
+        """Test autocomplete matches names containing the query."""
+        Ingredient.objects.create(user=self.user, name='Tomato paste')
+        Ingredient.objects.create(user=self.user, name='Cherry tomatoes')
+        Ingredient.objects.create(user=self.user, name='Potato')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'TOMATO'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Tomato paste', 'Cherry tomatoes'],
+        )
+
+    def test_autocomplete_typo(self):
+        """Test autocomplete tolerates typos with pg_trgm."""
+        if not trigram_supported():
+            self.skipTest('Requires the pg_trgm extension.')
+        Ingredient.objects.create(user=self.user, name='Mozzarella')
+        Ingredient.objects.create(user=self.user, name='Basil')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'mozarela'})
+
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Mozzarella'],
+        )
@@ -0,0 +1,223 @@
+"""
+Tests for the number of database queries issued by the recipe APIs.
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tag,
+    Ingredient,
+)
+from recipe.tests.test_recipe_api import create_recipe as create_sample_recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Url for recipe detail."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe with a tag and an ingredient."""
+    recipe = create_sample_recipe(user, **params)
+    recipe.tags.add(Tag.objects.create(user=user, name=f'Tag {recipe.id}'))
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f'Ingredient {recipe.id}')
+    )
+
+    return recipe
+
+
+class QueryCountTestCase(TestCase):
+    """Base test case asserting upper bounds on executed queries."""
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        """Fail if the block executes more than `limit` queries."""
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+        self.assertLessEqual(
+            executed,
+            limit,
+            f'{executed} queries executed, expected at most {limit}:\n'
+            f'{queries}',
+        )
+
+
+class RecipeQueryCountTests(QueryCountTestCase):
+    """Test query counts of the recipe endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _list_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_constant(self):
+        """Test listing recipes does not issue queries per recipe."""
+        create_recipe(self.user)
+        single = self._list_query_count()
+
+        for _ in range(20):
+            create_recipe(self.user)
+        many = self._list_query_count()
+
+        self.assertEqual(single, many)
+
+    def test_list_max_queries(self):
+        """Test listing recipes loads relations in bounded queries."""
+        for _ in range(10):
+            create_recipe(self.user)
+
+        with self.assertMaxQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 10)
+
+    def test_filtered_list_max_queries(self):
+        """Test filtering recipes loads relations in bounded queries."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for _ in range(10):
+            create_recipe(self.user).tags.add(tag)
+
+        with self.assertMaxQueries(3):
+            res = self.client.get(RECIPES_URL, {'tags': str(tag.id)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 10)
+
+    def test_retrieve_max_queries(self):
+        """Test retrieving a recipe loads relations in bounded queries."""
+        recipe = create_recipe(self.user)
+
+        with self.assertMaxQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_max_queries(self):
+        """Test creating a recipe with tags runs in bounded queries."""
+        payload = {
+            'title': 'Pie',
+            'time_minutes': 50,
+            'price': Decimal('2.50'),
+            'tags': [{'name': 'Dessert'}, {'name': 'Baking'}],
+            'ingredients': [{'name': 'Flour'}, {'name': 'Sugar'}],
+        }
+
+        with self.assertMaxQueries(15):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_query_count_independent_of_tags(self):
+        """Test creating a recipe does not issue queries per tag."""
+        counts = []
+        for size in (2, 30):
+            payload = {
+                'title': f'Recipe {size}',
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+                'tags': [{'name': f'Tag {i}'} for i in range(size)],
+                'ingredients': [
+                    {'name': f'Ingredient {i}'} for i in range(size)
+                ],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_update_max_queries(self):
+        """Test updating a recipe with tags runs in bounded queries."""
+        recipe = create_recipe(self.user)
+        payload = {
+            'tags': [{'name': 'Dessert'}, {'name': 'Baking'}],
+            'ingredients': [{'name': 'Flour'}, {'name': 'Sugar'}],
+        }
+
+        with self.assertMaxQueries(24):
+            res = self.client.patch(
+                detail_url(recipe.id),
+                payload,
+                format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_query_count_independent_of_tags(self):
+        """Test updating a recipe does not issue queries per tag."""
+        counts = []
+        for size in (1, 30):
+            recipe = create_recipe(self.user)
+            payload = {
+                'tags': [{'name': f'New tag {i}'} for i in range(size)],
+                'ingredients': [
+                    {'name': f'New ingredient {i}'} for i in range(size)
+                ],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.patch(
+                    detail_url(recipe.id),
+                    payload,
+                    format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(recipe.tags.count(), size)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class RecipeAttrQueryCountTests(QueryCountTestCase):
+    """Test query counts of the tag and ingredient endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        for _ in range(10):
+            create_recipe(self.user)
+
+    def test_list_tags_max_queries(self):
+        """Test listing tags runs a single query."""
+        with self.assertMaxQueries(1):
+            res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data), 10)
+
+    def test_list_ingredients_max_queries(self):
+        """Test listing ingredients runs a single query."""
+        with self.assertMaxQueries(1):
+            res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data), 10)
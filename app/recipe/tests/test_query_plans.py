@@ -0,0 +1,207 @@
+"""
+Tests for the query plans of the recipe APIs.
+"""
+import json
+import random
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+USERS = 10
+RECIPES_PER_USER = 300
+ATTRS_PER_USER = 50
+ATTRS_PER_RECIPE = 3
+
+
+def plan_nodes(plan):
+    """Yield every node of a JSON EXPLAIN plan."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class QueryPlanTests(TestCase):
+    """Test API queries are served by indexes on a seeded dataset.
+
+    The seeded tables are small enough for the planner to legitimately
+    prefer sequential scans and sorts, so they are disabled while
+    explaining: any that remain have no index-backed alternative.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rand = random.Random(0)
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(email=f'user{i}@example.com')
+            for i in range(USERS)
+        ])
+        cls.user = users[0]
+        for user in users:
+            tags = Tag.objects.bulk_create([
+                Tag(user=user, name=f'Tag {i}')
+                for i in range(ATTRS_PER_USER)
+            ])
+            ingredients = Ingredient.objects.bulk_create([
+                Ingredient(user=user, name=f'Ingredient {i}')
+                for i in range(ATTRS_PER_USER)
+            ])
+            recipes = Recipe.objects.bulk_create([
+                Recipe(
+                    user=user,
+                    title=f'Recipe {i}',
+                    time_minutes=10,
+                    price=Decimal('5.00'),
+                )
+                for i in range(RECIPES_PER_USER)
+            ])
+            Recipe.tags.through.objects.bulk_create([
+                Recipe.tags.through(recipe=recipe, tag=tag)
+                for recipe in recipes
+                for tag in rand.sample(tags, ATTRS_PER_RECIPE)
+            ])
+            Recipe.ingredients.through.objects.bulk_create([
+                Recipe.ingredients.through(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                )
+                for recipe in recipes
+                for ingredient in rand.sample(ingredients, ATTRS_PER_RECIPE)
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.tag = Tag.objects.filter(user=cls.user).first()
+        cls.ingredient = Ingredient.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _plans(self, url, params):
+        """Return the EXPLAIN plans of the queries run for a request."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        plans = []
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('SET enable_sort = off')
+            try:
+                for query in ctx.captured_queries:
+                    cursor.execute(f'EXPLAIN (FORMAT JSON) {query["sql"]}')
+                    explained = cursor.fetchone()[0]
+                    if isinstance(explained, str):
+                        explained = json.loads(explained)
+                    plans.append((query['sql'], explained[0]['Plan']))
+            finally:
+                cursor.execute('RESET enable_seqscan')
+                cursor.execute('RESET enable_sort')
+
+        return plans
+
+    def assertIndexedPlans(self, url, params):
+        """Assert no sequential scans or sorts run for a request."""
+        for sql, plan in self._plans(url, params):
+            for node in plan_nodes(plan):
+                self.assertNotEqual(
+                    node['Node Type'],
+                    'Seq Scan',
+                    f'Sequential scan on {node.get("Relation Name")}: {sql}',
+                )
+                self.assertNotIn(
+                    node['Node Type'],
+                    ['Sort', 'Incremental Sort'],
+                    f'Sort in plan: {sql}',
+                )
+
+    def assertUsesIndex(self, url, params, index_name):
+        """Assert the first query of a request scans the given index."""
+        sql, plan = self._plans(url, params)[0]
+        indexes = [node.get('Index Name') for node in plan_nodes(plan)]
+        self.assertIn(index_name, indexes, sql)
+
+    def test_recipe_list_plan(self):
+        """Test listing recipes uses indexes without sorting."""
+        self.assertIndexedPlans(RECIPES_URL, {'page_size': 20})
+        self.assertUsesIndex(
+            RECIPES_URL,
+            {'page_size': 20},
+            'recipe_user_id_desc_idx',
+        )
+
+    def test_recipe_filter_plans(self):
+        """Test filtering recipes uses indexes without sorting."""
+        self.assertIndexedPlans(
+            RECIPES_URL,
+            {'tags': str(self.tag.id), 'page_size': 20},
+        )
+        self.assertIndexedPlans(
+            RECIPES_URL,
+            {'ingredients': str(self.ingredient.id), 'page_size': 20},
+        )
+
+    def test_recipe_filter_all_plan(self):
+        """Test filtering recipes with match all uses indexes."""
+        tag_ids = Tag.objects.filter(user=self.user).values_list(
+            'id',
+            flat=True,
+        )[:2]
+        self.assertIndexedPlans(
+            RECIPES_URL,
+            {
+                'tags': ','.join(str(tag_id) for tag_id in tag_ids),
+                'match': 'all',
+                'page_size': 20,
+            },
+        )
+
+    def test_recipe_filter_uses_reverse_indexes(self):
+        """Test filtering recipes scans the reverse through indexes."""
+        self.assertUsesIndex(
+            RECIPES_URL,
+            {'tags': str(self.tag.id)},
+            'recipe_tags_tag_recipe_idx',
+        )
+        self.assertUsesIndex(
+            RECIPES_URL,
+            {'ingredients': str(self.ingredient.id)},
+            'recipe_ingredients_ingredient_recipe_idx',
+        )
+
+    def test_tag_list_plan(self):
+        """Test listing tags uses indexes without sorting."""
+        self.assertIndexedPlans(TAGS_URL, {'page_size': 20})
+        self.assertUsesIndex(
+            TAGS_URL,
+            {'page_size': 20},
+            'unique_tag_name_per_user',
+        )
+
+    def test_ingredient_list_plan(self):
+        """Test listing ingredients uses indexes without sorting."""
+        self.assertIndexedPlans(INGREDIENTS_URL, {'page_size': 20})
+        self.assertUsesIndex(
+            INGREDIENTS_URL,
+            {'page_size': 20},
+            'unique_ingredient_name_per_user',
+        )
@@ -2,13 +2,25 @@
 Tests for recipe APIs.
 """
 from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+import csv
+import io
+import json
 import tempfile
 import os
+import time
 
 from PIL import Image
 
-from django.test import TestCase
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import m2m_changed
 from django.urls import reverse
 
 from rest_framework import status
@@ -18,13 +30,19 @@ from core.models import (
     Recipe,
     Tag,
     Ingredient,
+    recipe_image_file_path,
 )
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
 )
+from recipe.pagination import RecipeCursorPagination
+from recipe.renditions import generate_renditions
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BATCH_URL = reverse('recipe:recipe-batch')
+EXPORT_URL = reverse('recipe:recipe-export')
+FACETS_URL = reverse('recipe:recipe-facets')
 
 def create_user(**params):
     """Create and return a new user."""
@@ -154,6 +172,31 @@ class PrivateRecipeTests(TestCase):
         self.assertEqual(recipe.link, original_link)
         self.assertEqual(recipe.user, self.user)
 
+    def test_partial_update_keeps_renditions(self):
+        """Test an update does not overwrite renditions stored meanwhile."""
+        recipe = create_recipe(user=self.user)
+        renditions = {'160': 'rendition.webp'}
+        update = RecipeDetailSerializer.update
+
+        def update_after_renditions(serializer, instance, validated_data):
+            Recipe.objects.filter(id=instance.id).update(
+                image_renditions=renditions,
+            )
+            return update(serializer, instance, validated_data)
+
+        with patch.object(
+            RecipeDetailSerializer,
+            'update',
+            autospec=True,
+            side_effect=update_after_renditions,
+        ):
+            res = self.client.patch(detail_url(recipe.id), {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual(recipe.image_renditions, renditions)
+
     def test_full_update(self):
         """Test full update of a recipe."""
         recipe = create_recipe(user=self.user)
@@ -372,6 +415,74 @@ class PrivateRecipeTests(TestCase):
         self.assertIn(ingredient2, recipe.ingredients.all())
         self.assertNotIn(ingredient1, recipe.ingredients.all())
 
+    def test_update_tags_touches_only_changed_rows(self):
+        """Test updating tags only inserts and deletes the difference."""
+        recipe = create_recipe(user=self.user)
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(40)
+        ]
+        recipe.tags.add(*tags)
+        through = Recipe.tags.through
+        kept_rows = set(through.objects.filter(
+            recipe=recipe,
+        ).exclude(tag=tags[0]).values_list('id', flat=True))
+
+        changes = []
+
+        def record(action, pk_set, **kwargs):
+            if action in ('pre_add', 'pre_remove', 'pre_clear'):
+                changes.append((action, set(pk_set or [])))
+
+        m2m_changed.connect(record, sender=through)
+        self.addCleanup(m2m_changed.disconnect, record, sender=through)
+
+        payload = {
+            'tags': [{'name': tag.name} for tag in tags[1:]] +
+            [{'name': 'New tag'}],
+        }
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        new_tag = Tag.objects.get(user=self.user, name='New tag')
+        self.assertEqual(changes, [
+            ('pre_remove', {tags[0].id}),
+            ('pre_add', {new_tag.id}),
+        ])
+        rows = set(through.objects.filter(
+            recipe=recipe,
+        ).exclude(tag=new_tag).values_list('id', flat=True))
+        self.assertEqual(rows, kept_rows)
+        self.assertEqual(recipe.tags.count(), 40)
+
+    def test_update_unchanged_ingredients_touches_no_rows(self):
+        """Test resending the same ingredients leaves rows untouched."""
+        recipe = create_recipe(user=self.user)
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.ingredients.add(ingredient)
+        through = Recipe.ingredients.through
+        rows = list(through.objects.filter(recipe=recipe).values_list('id'))
+
+        changes = []
+
+        def record(action, **kwargs):
+            changes.append(action)
+
+        m2m_changed.connect(record, sender=through)
+        self.addCleanup(m2m_changed.disconnect, record, sender=through)
+
+        payload = {'ingredients': [{'name': 'Salt'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(changes, [])
+        self.assertEqual(
+            list(through.objects.filter(recipe=recipe).values_list('id')),
+            rows,
+        )
+
     def test_filter_by_tags(self):
         """Test filering recipes by tags."""
         r1 = create_recipe(user=self.user, title='Cacke')
@@ -415,7 +526,533 @@ class PrivateRecipeTests(TestCase):
         self.assertNotIn(s3.data, res.data)
 
 
+    def test_list_paginated_with_cursor(self):
+        """Test walking the recipe list page by page."""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        ids = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [item['id'] for item in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    def test_list_page_size_capped(self):
+        """Test the requested page size is capped."""
+        for _ in range(3):
+            create_recipe(user=self.user)
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPES_URL, {'page_size': 100})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_list_invalid_cursor(self):
+        """Test an invalid cursor returns an error."""
+        res = self.client.get(RECIPES_URL, {'cursor': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test recipes matching several tags are returned once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Dessert')
+        tag2 = Tag.objects.create(user=self.user, name='Bakery')
+        recipe.tags.add(tag1, tag2)
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [recipe.id])
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes having all of the given tags."""
+        r1 = create_recipe(user=self.user, title='Cake')
+        r2 = create_recipe(user=self.user, title='Pie')
+        tag1 = Tag.objects.create(user=self.user, name='Dessert')
+        tag2 = Tag.objects.create(user=self.user, name='Bakery')
+        r1.tags.add(tag1, tag2)
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [r1.id])
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        """Test match all applies to tags and ingredients together."""
+        r1 = create_recipe(user=self.user, title='Soup')
+        r2 = create_recipe(user=self.user, title='Salad')
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        ing1 = Ingredient.objects.create(user=self.user, name='Salt')
+        ing2 = Ingredient.objects.create(user=self.user, name='Potato')
+        r1.tags.add(tag)
+        r1.ingredients.add(ing1, ing2)
+        r2.tags.add(tag)
+        r2.ingredients.add(ing1)
+
+        params = {
+            'tags': f'{tag.id}',
+            'ingredients': f'{ing1.id},{ing2.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [r1.id])
+
+    def test_filter_invalid_ids(self):
+        """Test filtering with invalid IDs returns an error."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_match(self):
+        """Test filtering with an unknown match mode returns an error."""
+        res = self.client.get(RECIPES_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_search(self):
+        """Test searching recipes ranks stemmed title matches first."""
+        r1 = create_recipe(
+            user=self.user,
+            title='Tomato soup',
+            description='Slow cooked.',
+        )
+        r2 = create_recipe(
+            user=self.user,
+            title='Pasta',
+            description='With a fresh tomato sauce.',
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet.')
+        create_recipe(user=create_user(email='other@example.com',
+                                       password='test123'),
+                      title='Tomato salad')
+
+        res = self.client.get(RECIPES_URL, {'search': 'tomatoes'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [r1.id, r2.id])
+
+    def test_search_excluded_words(self):
+        """Test search terms prefixed with - exclude recipes."""
+        r1 = create_recipe(user=self.user, title='Tomato soup')
+        create_recipe(user=self.user, title='Tomato and onion soup')
+
+        res = self.client.get(RECIPES_URL, {'search': 'soup -onion'})
+
+        self.assertEqual([item['id'] for item in res.data], [r1.id])
+
+    def test_search_updated_recipe(self):
+        """Test updated titles are found by search."""
+        recipe = create_recipe(user=self.user, title='Soup')
+        self.client.patch(detail_url(recipe.id), {'title': 'Risotto'})
+
+        res = self.client.get(RECIPES_URL, {'search': 'risotto'})
+
+        self.assertEqual([item['id'] for item in res.data], [recipe.id])
+
+    def test_search_paginated(self):
+        """Test walking ranked search results page by page."""
+        in_title = [
+            create_recipe(user=self.user, title='Curry')
+            for _ in range(3)
+        ]
+        in_description = [
+            create_recipe(user=self.user, description='A mild curry.')
+            for _ in range(3)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'search': 'curry', 'page_size': 2})
+        ids = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [item['id'] for item in res.data['results']]
+
+        self.assertEqual(ids, [
+            recipe.id
+            for recipes in (in_title, in_description)
+            for recipe in reversed(recipes)
+        ])
+
+    def test_search_fallback(self):
+        """Test search on databases without full-text search."""
+        r1 = create_recipe(user=self.user, title='Green curry')
+        r2 = create_recipe(
+            user=self.user,
+            title='Rice',
+            description='Serve with green curry.',
+        )
+        create_recipe(user=self.user, title='Red curry')
+
+        with patch.object(connection, 'vendor', 'sqlite'):
+            res = self.client.get(RECIPES_URL, {'search': 'curry GREEN'})
+
+        self.assertEqual([item['id'] for item in res.data], [r1.id, r2.id])
+
+    def _fallback_search(self, query):
+        """Return the ids of the recipes found without full-text search."""
+        with patch.object(connection, 'vendor', 'sqlite'):
+            res = self.client.get(RECIPES_URL, {'search': query})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['id'] for item in res.data]
+
+    def test_search_fallback_excluded_words(self):
+        """Test the fallback excludes words and phrases prefixed with -."""
+        r1 = create_recipe(user=self.user, title='Tomato soup')
+        create_recipe(user=self.user, title='Tomato and onion soup')
+        create_recipe(
+            user=self.user,
+            title='Soup',
+            description='Add a red onion.',
+        )
+        r4 = create_recipe(user=self.user, title='Onion soup')
+
+        self.assertEqual(self._fallback_search('soup -onion'), [r1.id])
+        self.assertEqual(
+            self._fallback_search('soup -"red onion" -tomato'),
+            [r4.id],
+        )
+
+    def test_search_fallback_or(self):
+        """Test the fallback matches either side of OR."""
+        r1 = create_recipe(user=self.user, title='Tomato soup')
+        r2 = create_recipe(user=self.user, title='Potato soup')
+        create_recipe(user=self.user, title='Potato salad')
+        create_recipe(user=self.user, title='Onion soup')
+
+        self.assertEqual(
+            self._fallback_search('tomato or potato soup'),
+            [r2.id, r1.id],
+        )
+
+    def test_search_fallback_phrase(self):
+        """Test the fallback matches a quoted phrase as one substring."""
+        r1 = create_recipe(user=self.user, title='Red curry paste')
+        create_recipe(user=self.user, title='Red lentil curry')
+
+        self.assertEqual(self._fallback_search('"red curry"'), [r1.id])
+        self.assertEqual(len(self._fallback_search('red curry')), 2)
+
+
+class SparseFieldsTests(TestCase):
+    """Test choosing the fields of recipe responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title='Curry')
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(self.tag)
+
+    def test_fields(self):
+        """Test listing only some fields loads only their columns."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': self.recipe.id, 'title': 'Curry'}])
+        sql = '\n'.join(query['sql'] for query in queries)
+        self.assertNotIn('"core_recipe"."price"', sql)
+        self.assertNotIn('core_tag', sql)
+
+    def test_omit(self):
+        """Test omitting fields of a recipe."""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'omit': 'description,tags,ingredients,image_renditions'},
+        )
+
+        self.assertEqual(
+            set(res.data),
+            {'id', 'title', 'time_minutes', 'price', 'link'},
+        )
+
+    def test_unexpanded_relations(self):
+        """Test relations left out of expand are lists of IDs."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'fields': 'id,tags,ingredients', 'expand': 'ingredients'},
+        )
+
+        self.assertEqual(res.data, [{
+            'id': self.recipe.id,
+            'tags': [self.tag.id],
+            'ingredients': [],
+        }])
+
+    def test_unknown_fields(self):
+        """Test unknown fields return an error."""
+        for params in (
+            {'fields': 'id,secret'},
+            {'omit': 'secret'},
+            {'expand': 'title'},
+        ):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_return_all_fields(self):
+        """Test the fields parameter does not trim write responses."""
+        res = self.client.patch(
+            f'{detail_url(self.recipe.id)}?fields=id',
+            {'title': 'Red curry'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Red curry')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class BatchCreateRecipeTests(TestCase):
+    """Test creating recipes in batches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, ingredient='Salt'):
+        return [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '2.50',
+                'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+                'ingredients': [{'name': ingredient}],
+            }
+            for i in range(count)
+        ]
+
+    def test_batch_create(self):
+        """Test creating several recipes with shared tags."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = self._payload(3)
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        for item, result in zip(payload, res.data['results']):
+            self.assertEqual(result['status'], status.HTTP_201_CREATED)
+            recipe = Recipe.objects.get(id=result['data']['id'])
+            self.assertEqual(recipe.title, item['title'])
+            self.assertEqual(recipe.user, self.user)
+            self.assertEqual(
+                sorted(tag.name for tag in recipe.tags.all()),
+                sorted(tag['name'] for tag in item['tags']),
+            )
+            self.assertEqual(
+                result['data'],
+                RecipeDetailSerializer(recipe).data,
+            )
+
+    def test_batch_reports_invalid_items(self):
+        """Test invalid items are reported and valid ones created."""
+        payload = self._payload(2)
+        payload.insert(1, {'title': 'No price', 'time_minutes': 5})
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        results = res.data['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            [201, 400, 201],
+        )
+        self.assertIn('price', results[1]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_batch_all_invalid(self):
+        """Test a batch without valid items returns an error."""
+        res = self.client.post(BATCH_URL, [{'title': 'x'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_batch_requires_list(self):
+        """Test the batch payload must be a list."""
+        res = self.client.post(BATCH_URL, self._payload(1)[0], format='json')
 
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BATCH_MAX_SIZE=2)
+    def test_batch_size_limited(self):
+        """Test batches above the maximum size are rejected."""
+        res = self.client.post(BATCH_URL, self._payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_batch_query_count_independent_of_size(self):
+        """Test the number of queries does not grow with the batch."""
+        counts = []
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(
+                    BATCH_URL,
+                    self._payload(count, ingredient=f'Salt {count}'),
+                    format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class FacetRecipeTests(TestCase):
+    """Test counting recipes per tag and ingredient."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+        r1 = create_recipe(user=self.user, title='Fried rice')
+        r1.tags.add(self.vegan, self.quick)
+        r1.ingredients.add(self.rice)
+        r2 = create_recipe(user=self.user, title='Curry')
+        r2.tags.add(self.vegan)
+        r2.ingredients.add(self.rice)
+        other = create_user(email='other@example.com', password='test123')
+        create_recipe(user=other).tags.add(
+            Tag.objects.create(user=other, name='Vegan'),
+        )
+
+    def test_facets(self):
+        """Test counting all recipes of the user."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'tags': [
+                {'id': self.vegan.id, 'name': 'Vegan', 'count': 2},
+                {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+            ],
+            'ingredients': [
+                {'id': self.rice.id, 'name': 'Rice', 'count': 2},
+            ],
+        })
+        self.assertEqual(
+            sum('core_recipe_' in query['sql'] for query in queries),
+            2,
+        )
+
+    def test_facets_filtered(self):
+        """Test counts are scoped to the recipe filters."""
+        res = self.client.get(FACETS_URL, {'tags': f'{self.quick.id}'})
+
+        self.assertEqual(res.data['tags'], [
+            {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+            {'id': self.vegan.id, 'name': 'Vegan', 'count': 1},
+        ])
+
+    def test_facets_searched(self):
+        """Test counts are scoped to the search results."""
+        res = self.client.get(FACETS_URL, {'search': 'curry'})
+
+        self.assertEqual(res.data['tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'count': 1},
+        ])
+
+
+class ExportRecipeTests(TestCase):
+    """Test streaming recipe exports."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        pepper = Ingredient.objects.create(user=self.user, name='Pepper')
+        self.recipes[0].tags.add(tag)
+        self.recipes[0].ingredients.add(salt, pepper)
+        other_user = create_user(email='other@example.com', password='pass123')
+        create_recipe(user=other_user)
+
+    def _content(self, res):
+        return b''.join(res.streaming_content).decode()
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON across chunks."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in self._content(res).splitlines()]
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        expected = json.loads(json.dumps(
+            RecipeDetailSerializer(recipes, many=True).data
+        ))
+        # Related objects of the serializer come in no defined order.
+        for recipe in lines + expected:
+            for field in ('tags', 'ingredients'):
+                recipe[field].sort(key=lambda item: item['id'])
+        self.assertEqual(lines, expected)
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        res = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self._content(res))))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [recipe.id for recipe in self.recipes],
+        )
+        self.assertEqual(rows[0]['tags'], 'Dinner')
+        self.assertEqual(
+            sorted(rows[0]['ingredients'].split(';')),
+            ['Pepper', 'Salt'],
+        )
+        self.assertEqual(rows[0]['price'], '5.50')
+
+    def test_export_filtered(self):
+        """Test exports apply the list filters."""
+        tag_id = self.recipes[0].tags.get().id
+
+        res = self.client.get(EXPORT_URL, {'tags': str(tag_id)})
+
+        lines = self._content(res).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['id'], self.recipes[0].id)
+
+    def test_export_invalid_output(self):
+        """Test an unknown export format returns an error."""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(RECIPE_IMAGE_RENDITION_WORKERS=0)
 class UploadImageTest(TestCase):
     """Test upload image API."""
     def setUp(self):
@@ -428,8 +1065,23 @@ class UploadImageTest(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
+        for name in self.recipe.image_renditions.values():
+            self.recipe.image.storage.delete(name)
         self.recipe.image.delete()
 
+    def _upload(self, size=(10, 10)):
+        """Upload a JPEG image of a size to the recipe."""
+        url = upload_image_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', size).save(image_file, format='JPEG')
+            image_file.seek(0)
+            return self.client.post(
+                url,
+                {'image': image_file},
+                format='multipart',
+            )
+
     def test_upload_image(self):
         """"Test uploading an image to a recipe."""
         url = upload_image_url(self.recipe.id)
@@ -445,5 +1097,280 @@ class UploadImageTest(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_generates_renditions(self):
+        """Test renditions are generated after the upload commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self._upload(size=(2000, 1000))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_renditions'], {})
+        self.recipe.refresh_from_db()
+        storage = self.recipe.image.storage
+        self.assertEqual(
+            sorted(self.recipe.image_renditions, key=int),
+            ['160', '640', '1280'],
+        )
+        with storage.open(self.recipe.image_renditions['160']) as file:
+            rendition = Image.open(file)
+            self.assertEqual(rendition.format, 'WEBP')
+            self.assertEqual(rendition.size, (160, 80))
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertRegex(
+            res.data['image_renditions']['640'],
+            rf'/recipes/{self.recipe.id}/image/\?size=640&v=\w{{16}}$',
+        )
+
+    def test_new_upload_clears_renditions(self):
+        """Test a new image drops the renditions of the previous one."""
+        Recipe.objects.filter(id=self.recipe.id).update(
+            image_renditions={'160': 'missing.webp'},
+        )
+
+        res = self._upload()
+
+        self.assertEqual(res.data['image_renditions'], {})
+
+    def test_stale_renditions_discarded(self):
+        """Test renditions of a replaced image are not attached."""
+        self._upload()
+        self.recipe.refresh_from_db()
+        old_name = self.recipe.image.name
+        self._upload(size=(20, 20))
+
+        with self.settings(RECIPE_IMAGE_RENDITION_SIZES=[16]):
+            generate_renditions(self.recipe.id, old_name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_renditions, {})
+        self.recipe.image.storage.delete(old_name)
+
+    def test_reused_renditions_touched(self):
+        """Test renditions reused for the same image are marked in use."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+        self.recipe.refresh_from_db()
+        storage = self.recipe.image.storage
+        other = create_recipe(user=self.user, image=self.recipe.image.name)
+        old = time.time() - 120
+        for name in self.recipe.image_renditions.values():
+            os.utime(storage.path(name), (old, old))
+
+        generate_renditions(other.id, self.recipe.image.name)
+
+        other.refresh_from_db()
+        self.assertEqual(other.image_renditions, self.recipe.image_renditions)
+        for name in other.image_renditions.values():
+            self.assertGreater(os.stat(storage.path(name)).st_mtime, old)
+
+    def test_same_image_shared(self):
+        """Test recipes uploading the same image share one file."""
+        other = create_recipe(user=self.user)
+        self._upload()
+        url = upload_image_url(other.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            self.client.post(url, {'image': image_file}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+
+    @override_settings(RECIPE_IMAGE_MIN_AGE=0)
+    def test_replaced_image_released(self):
+        """Test a replaced image is deleted once no recipe uses it."""
+        other = create_recipe(user=self.user)
+        self._upload()
+        self.recipe.refresh_from_db()
+        shared = self.recipe.image.name
+        Recipe.objects.filter(id=other.id).update(image=shared)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(20, 20))
+
+        self.assertTrue(self.recipe.image.storage.exists(shared))
+        other.delete()
+        self.recipe.refresh_from_db()
+        replaced = self.recipe.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(30, 30))
+
+        self.assertFalse(self.recipe.image.storage.exists(replaced))
+        self.recipe.image.storage.delete(shared)
+
+    @override_settings(RECIPE_IMAGE_MIN_AGE=0)
+    def test_deleted_recipe_image_released(self):
+        """Test deleting a recipe deletes its unused image."""
+        self._upload()
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+
+        self.assertFalse(self.recipe.image.storage.exists(name))
+        self.recipe = create_recipe(user=self.user)
+
+    @override_settings(RECIPE_IMAGE_MIN_AGE=60)
+    def test_recently_touched_image_kept(self):
+        """Test an image an identical upload just reused is not deleted."""
+        self._upload()
+        self.recipe.refresh_from_db()
+        storage = self.recipe.image.storage
+        name = self.recipe.image.name
+        old = time.time() - 120
+        os.utime(storage.path(name), (old, old))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+            # An identical upload stores its file before its recipe.
+            with storage.open(name) as file:
+                saved = storage.save(
+                    recipe_image_file_path(None, name),
+                    file,
+                )
+
+        self.assertEqual(saved, name)
+        self.assertTrue(storage.exists(name))
+        storage.delete(name)
+        self.recipe = create_recipe(user=self.user)
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_too_large_refused(self):
+        """Test bodies larger than the limit are refused with 413."""
+        with patch('recipe.uploads.MULTIPART_OVERHEAD', 0):
+            res = self._upload(size=(200, 200))
 
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_stream_too_large_refused(self):
+        """Test files growing past the limit are refused while streaming."""
+        res = self._upload(size=(200, 200))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
 
+    def test_upload_not_an_image_refused(self):
+        """Test files without an image signature are refused with 415."""
+        url = upload_image_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            image_file.write(b'#!/bin/sh\necho not an image\n')
+            image_file.seek(0)
+            res = self.client.post(
+                url,
+                {'image': image_file},
+                format='multipart',
+            )
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_upload_too_many_pixels_refused(self):
+        """Test images with too many pixels are refused."""
+        res = self._upload(size=(20, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    def test_upload_exif_stripped_and_oriented(self):
+        """Test EXIF orientation is applied and metadata removed."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera maker'
+        url = upload_image_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpeg') as image_file:
+            Image.new('RGB', (40, 20)).save(
+                image_file,
+                format='JPEG',
+                exif=exif.tobytes(),
+            )
+            image_file.seek(0)
+            res = self.client.post(
+                url,
+                {'image': image_file},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith('.jpg'))
+        with Image.open(self.recipe.image.path) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
+
+    @override_settings(RECIPE_MEDIA_X_ACCEL=True)
+    def test_image_handed_to_proxy(self):
+        """Test images are delivered with X-Accel-Redirect."""
+        url = self._upload().data['image']
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(url, HTTP_ACCEPT='image/*')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            f'/protected-media/{self.recipe.image.name}',
+        )
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('private', res['Cache-Control'])
+        self.assertEqual(res.content, b'')
+
+    @override_settings(RECIPE_MEDIA_X_ACCEL=False)
+    def test_image_streamed_without_proxy(self):
+        """Test images are streamed by Django without the proxy."""
+        url = self._upload().data['image']
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(url)
+
+        with open(self.recipe.image.path, 'rb') as image_file:
+            self.assertEqual(
+                b''.join(res.streaming_content),
+                image_file.read(),
+            )
+
+    def test_image_not_modified(self):
+        """Test a matching ETag returns 304."""
+        url = self._upload().data['image']
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_image_rendition(self):
+        """Test renditions are delivered by size."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+        self.recipe.refresh_from_db()
+        url = reverse('recipe:recipe-image', args=[self.recipe.id])
+
+        res = self.client.get(url, {'size': '160'})
+        missing = self.client.get(url, {'size': '99'})
+
+        self.assertEqual(res['Content-Type'], 'image/webp')
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_of_other_user_not_found(self):
+        """Test users can not fetch images of other users' recipes."""
+        url = self._upload().data['image']
+        other = create_user(email='other@example.com', password='pass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
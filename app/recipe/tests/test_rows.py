@@ -0,0 +1,114 @@
+"""
+Tests for list responses built from values() rows.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class RowListTests(TestCase):
+    """Test the row based lists render exactly like the serializers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Quick', 'Dinner')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Rice', 'Salt')
+        ]
+        for index, price in enumerate(['5.00', '12.50', '0.99', '100']):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Rice dish {index}',
+                description='Cooked slowly with rice.' if index % 2 else '',
+                time_minutes=10 * index,
+                price=Decimal(price),
+                link=f'https://example.com/{index}' if index else '',
+                image_renditions=(
+                    {'160': f'uploads/recipe/renditions/{index}-160.webp'}
+                    if index % 2 else {}
+                ),
+            )
+            recipe.tags.add(*tags[:index])
+            recipe.ingredients.add(*ingredients[index % 2:])
+        Tag.objects.create(
+            user=get_user_model().objects.create_user(
+                email='other@example.com',
+                password='testpass123',
+            ),
+            name='Vegan',
+        )
+
+    def assertSameResponses(self, url, params=None):
+        """Assert both list paths return byte identical responses."""
+        responses = []
+        for fast in (False, True):
+            with override_settings(RECIPE_FAST_LIST=fast):
+                responses.append(self.client.get(url, params))
+
+        serialized, rows = responses
+        self.assertEqual(serialized.status_code, status.HTTP_200_OK)
+        self.assertEqual(rows.status_code, status.HTTP_200_OK)
+        self.assertEqual(rows.content, serialized.content)
+
+    def test_recipes(self):
+        """Test recipe lists with filters, search and pages."""
+        tag = Tag.objects.get(user=self.user, name='Quick')
+        for params in (
+            None,
+            {'tags': tag.id},
+            {'search': 'rice'},
+            {'page_size': 3},
+            {'search': 'rice', 'page_size': 1},
+            {'fields': 'title,id,price'},
+            {'omit': 'tags,link'},
+            {'expand': 'ingredients'},
+            {'expand': ''},
+        ):
+            with self.subTest(params=params):
+                self.assertSameResponses(RECIPES_URL, params)
+
+    def test_recipe_next_page(self):
+        """Test cursors of row based pages are valid."""
+        with override_settings(RECIPE_FAST_LIST=True):
+            res = self.client.get(RECIPES_URL, {'page_size': 3})
+
+        self.assertSameResponses(res.data['next'])
+
+    def test_tags_and_ingredients(self):
+        """Test tag and ingredient lists, pages and autocomplete."""
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            for params in (
+                None,
+                {'assigned_only': 1},
+                {'page_size': 1},
+                {'q': 'i'},
+            ):
+                with self.subTest(url=url, params=params):
+                    self.assertSameResponses(url, params)
@@ -86,6 +86,33 @@ class PrivateTagApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name(self):
+        """Test renaming a tag to a name in use returns an error."""
+        tag = Tag.objects.create(user=self.user, name='Desert')
+        Tag.objects.create(user=self.user, name='Lunch')
+
+        for method in (self.client.patch, self.client.put):
+            res = method(detail_url(tag.id), {'name': 'Lunch'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('name', res.data)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Desert')
+
+    def test_update_tag_same_name(self):
+        """Test a tag can be saved under its own name."""
+        tag = Tag.objects.create(user=self.user, name='Desert')
+        Tag.objects.create(
+            user=create_user(email='other@example.com'),
+            name='Lunch',
+        )
+
+        res = self.client.put(detail_url(tag.id), {'name': 'Desert'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Lunch'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_tag(self):
         """Test deleting tag."""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -140,10 +167,62 @@ class PrivateTagApiTest(TestCase):
         res = self.client.get(TAGS_URL, params)
         self.assertEqual(len(res.data), 1)
 
+    def test_list_paginated_with_cursor(self):
+        """Test walking the tags list page by page."""
+        names = ['A', 'B', 'C', 'D', 'E']
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
 
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        result = [item['name'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            result += [item['name'] for item in res.data['results']]
 
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(result, sorted(names, reverse=True))
+
+    def test_autocomplete(self):
+        """Test autocomplete ranks prefix matches, then usage."""
+        Tag.objects.create(user=self.user, name='Sweet breakfast')
+        Tag.objects.create(user=self.user, name='Bread')
+        used = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Dinner')
+        Tag.objects.create(
+            user=create_user(email='other@example.com'),
+            name='Breakfast',
+        )
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Eggs',
+            time_minutes=10,
+            price=Decimal('1.50'),
+        )
+        recipe.tags.add(used)
 
+        res = self.client.get(TAGS_URL, {'q': 'brea'})
 
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Breakfast', 'Bread', 'Sweet breakfast'],
+        )
+
+    def test_autocomplete_limit(self):
+        """Test autocomplete returns at most limit matches."""
+        for name in ['Tea', 'Tapas', 'Tacos']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'q': 't', 'limit': 2})
 
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Tacos', 'Tapas'],
+        )
 
+    def test_autocomplete_invalid_limit(self):
+        """Test an invalid autocomplete limit returns an error."""
+        res = self.client.get(TAGS_URL, {'q': 't', 'limit': 'all'})
 
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,187 @@
+"""
+Streaming, size-capped handling of recipe image uploads.
+
+Bodies are rejected from their Content-Length and the first bytes of
+the file before they are read, files are streamed to disk as they
+arrive and dimensions are read from the image header before anything
+is decoded.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import (
+    MultiPartParser as DjangoMultiPartParser,
+    MultiPartParserError,
+)
+from PIL import (
+    Image,
+    ImageOps,
+)
+from rest_framework import (
+    serializers,
+    status,
+)
+from rest_framework.exceptions import (
+    APIException,
+    ParseError,
+    UnsupportedMediaType,
+)
+from rest_framework.parsers import (
+    DataAndFiles,
+    MultiPartParser,
+)
+
+from recipe.media import image_url
+
+# Room for the multipart boundaries and headers around the file.
+MULTIPART_OVERHEAD = 16 * 1024
+
+IMAGE_SIGNATURES = {
+    'JPEG': [(0, b'\xff\xd8\xff')],
+    'PNG': [(0, b'\x89PNG\r\n\x1a\n')],
+    'GIF': [(0, b'GIF87a'), (0, b'GIF89a')],
+    'WEBP': [(0, b'RIFF'), (8, b'WEBP')],
+}
+IMAGE_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+
+
+class RequestEntityTooLarge(APIException):
+    """The request body is larger than allowed."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Image is too large.'
+    default_code = 'too_large'
+
+
+def sniff_image_format(data):
+    """Return the image format the leading bytes belong to, or None."""
+    for image_format, signature in IMAGE_SIGNATURES.items():
+        if all(
+            data[offset:offset + len(magic)] == magic
+            for offset, magic in signature
+        ):
+            return image_format
+
+    return None
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk, refusing oversize and non-image files."""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Refuse bodies announced as too large before reading them."""
+        max_size = settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+        if content_length and content_length > max_size + MULTIPART_OVERHEAD:
+            raise RequestEntityTooLarge()
+
+    def receive_data_chunk(self, raw_data, start):
+        """Check the leading bytes and running size of the file."""
+        if start == 0 and sniff_image_format(raw_data) is None:
+            self.file.close()
+            raise UnsupportedMediaType(
+                self.content_type,
+                detail='Upload a JPEG, PNG, GIF or WebP image.',
+            )
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE:
+            self.file.close()
+            raise RequestEntityTooLarge()
+
+        return super().receive_data_chunk(raw_data, start)
+
+
+class RecipeImageParser(MultiPartParser):
+    """Multipart parser using RecipeImageUploadHandler for files."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        upload_handlers = [RecipeImageUploadHandler(request)]
+
+        try:
+            parser = DjangoMultiPartParser(
+                meta,
+                stream,
+                upload_handlers,
+                encoding,
+            )
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as exc:
+            raise ParseError(f'Multipart form parse error - {exc}')
+
+
+def prepare_image(file):
+    """Validate an uploaded image and return it without EXIF metadata.
+
+    Only the header is read to check the format and dimensions. Images
+    carrying EXIF are decoded once to apply their orientation and saved
+    again without the metadata; other images are kept as uploaded.
+    """
+    try:
+        image = Image.open(file)
+    except (OSError, Image.DecompressionBombError):
+        raise serializers.ValidationError('Upload a valid image.')
+    if image.format not in IMAGE_EXTENSIONS:
+        raise serializers.ValidationError(
+            'Upload a JPEG, PNG, GIF or WebP image.'
+        )
+    width, height = image.size
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise serializers.ValidationError(
+            f'Image is {width}x{height}, images can have at most '
+            f'{settings.RECIPE_IMAGE_MAX_PIXELS} pixels.'
+        )
+
+    name = f'image{IMAGE_EXTENSIONS[image.format]}'
+    if not image.getexif():
+        file.seek(0)
+        file.name = name
+        return file
+
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    image.info.pop('exif', None)
+    output = tempfile.NamedTemporaryFile(
+        suffix=os.path.splitext(name)[1],
+        dir=settings.FILE_UPLOAD_TEMP_DIR,
+    )
+    image.save(
+        output,
+        format=image_format,
+        quality=90,
+        icc_profile=image.info.get('icc_profile'),
+    )
+    output.seek(0)
+
+    return File(output, name=name)
+
+
+class RecipeImageField(serializers.FileField):
+    """Image field validating uploads with prepare_image.
+
+    Images are represented by their private, versioned URL.
+    """
+
+    def to_internal_value(self, data):
+        return prepare_image(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        return image_url(
+            value.instance.id,
+            value.name,
+            request=self.context.get('request'),
+        )
@@ -1,6 +1,14 @@
 """
 Views for the recipe APIs.
 """
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Exists,
+    OuterRef,
+    Prefetch,
+)
+from django.http import StreamingHttpResponse
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -14,11 +22,47 @@ from rest_framework import (
 )
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotFound,
+    ValidationError,
+)
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from user.authentication import CachedTokenAuthentication
 from recipe import serializers
+from recipe.export import (
+    csv_lines,
+    iter_recipes,
+    ndjson_lines,
+)
+from recipe.cache import (
+    CachedListMixin,
+    ConditionalGetMixin,
+)
+from recipe.renditions import (
+    enqueue_renditions,
+    release_image,
+)
+from recipe.media import (
+    MediaContentNegotiation,
+    serve_file,
+)
+from recipe.uploads import RecipeImageParser
+from recipe.search import search_recipes
+from recipe.autocomplete import autocomplete
+from recipe.facets import (
+    FACET_FIELDS,
+    facet_counts,
+)
+from recipe.rows import (
+    RowListMixin,
+    relation,
+)
+from recipe.pagination import (
+    RecipeCursorPagination,
+    NameCursorPagination,
+)
 from core.models import (
     Recipe,
     Tag,
@@ -26,9 +70,31 @@ from core.models import (
 )
 
 
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of the fields to return.',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields not to return.',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description='Comma separated list of the relations (tags, '
+                    'ingredients) to return as objects, the others are '
+                    'returned as lists of IDs. All are expanded if absent.',
+    ),
+]
+
+
 @extend_schema_view(
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
     list=extend_schema(
-        parameters=[
+        parameters=SPARSE_FIELDS_PARAMETERS + [
             OpenApiParameter(
                 'tags',
                 OpenApiTypes.STR,
@@ -38,38 +104,169 @@ from core.models import (
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma seperated list of ingrdient IDs to filter.'
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Match recipes having any (default) or all '
+                            'of the given tags and ingredients.',
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search in titles and descriptions, '
+                            'results are ordered by relevance. Supports '
+                            '"quoted phrases", OR and -excluded words.',
+            ),
         ]
     )
 )
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CachedListMixin,
+                    RowListMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe API."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    conditional_actions = ('list', 'retrieve', 'facets')
+    sparse_actions = ('list', 'retrieve')
 
     def _params_to_integer(self, qs):
-        """Convert a list of strings  to intenger."""
-        return [int(str_id) for str_id in qs.split(',')]
+        """Convert a comma separated string of IDs to integers."""
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {'detail': f'Invalid list of IDs: {qs!r}.'}
+            )
+
+    def _filter_related(self, queryset, field, ids, match):
+        """Filter recipes by related IDs with semi-joins."""
+        through, column, _, _ = relation(field)
+        related = through.objects.filter(recipe_id=OuterRef('pk'))
+        if match == 'all':
+            for related_id in set(ids):
+                queryset = queryset.filter(
+                    Exists(related.filter(**{column: related_id}))
+                )
+            return queryset
+
+        return queryset.filter(
+            Exists(related.filter(**{f'{column}__in': ids}))
+        )
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', 'any')
+        search = self.request.query_params.get('search', '').strip()
+        if match not in ('any', 'all'):
+            raise ValidationError(
+                {'match': 'Must be one of: any, all.'}
+            )
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_integer(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(queryset, 'tags', tag_ids, match)
         if ingredients:
             ingredient_ids = self._params_to_integer(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_related(
+                queryset,
+                'ingredients',
+                ingredient_ids,
+                match,
+            )
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
+        queryset = queryset.filter(user=self.request.user)
+        if self.action == 'image':
+            return queryset.only('id', 'image', 'image_renditions')
+        if search and self.action in ('list', 'export', 'facets'):
+            queryset = search_recipes(queryset, search).order_by(
+                '-search_rank',
+                '-id',
+            )
+        else:
+            queryset = queryset.order_by('-id')
+        if self.action in self.sparse_actions:
+            return self._select_fields(queryset)
+
+        return queryset.prefetch_related(
+            'tags',
+            'ingredients',
+        )
+
+    def _param_list(self, name):
+        """Return a comma separated parameter as a list, None if absent."""
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+
+        return [item for item in value.split(',') if item]
 
+    def _sparse_fields(self):
+        """Return the fields and the unexpanded relations requested."""
+        if not hasattr(self, '_sparse'):
+            available = self.get_serializer_class().Meta.fields
+            relations = [
+                name for name in available
+                if Recipe._meta.get_field(name).many_to_many
+            ]
+            fields = self._param_list('fields') or available
+            omit = self._param_list('omit') or []
+            expand = self._param_list('expand')
+            if expand is None:
+                expand = relations
+            for param, names, allowed in (
+                ('fields', fields, available),
+                ('omit', omit, available),
+                ('expand', expand, relations),
+            ):
+                unknown = [name for name in names if name not in allowed]
+                if unknown:
+                    raise ValidationError({
+                        param: f'Unknown fields: {", ".join(unknown)}.',
+                    })
+            fields = [name for name in fields if name not in omit]
+            self._sparse = {
+                'fields': fields,
+                'unexpanded': [
+                    name for name in relations if name not in expand
+                ],
+            }
+
+        return self._sparse
+
+    def _select_fields(self, queryset):
+        """Load only the columns and relations of the requested fields."""
+        sparse = self._sparse_fields()
+        columns = []
+        for name in sparse['fields']:
+            field = Recipe._meta.get_field(name)
+            if field.many_to_many:
+                # Ordered like the related maps of recipe.rows.
+                related = field.related_model.objects.order_by('id')
+                if name in sparse['unexpanded']:
+                    related = related.only('id')
+                queryset = queryset.prefetch_related(
+                    Prefetch(name, queryset=related),
+                )
+            else:
+                columns.append(name)
+
+        return queryset.only('id', *columns)
+
+
+    def get_serializer(self, *args, **kwargs):
+        """Pass the requested fields to the serializer of reads."""
+        if self.action in self.sparse_actions:
+            kwargs.update(self._sparse_fields())
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Get serializer list for view."""
@@ -85,14 +282,170 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: OpenApiTypes.OBJECT,
+            status.HTTP_400_BAD_REQUEST: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(methods=['POST'], detail=False, url_path='batch')
+    def batch(self, request):
+        """Create many recipes in one request.
+
+        Returns a result per submitted item: the created recipe, or the
+        validation errors of items that were skipped.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'detail': 'Expected a list of recipes.'})
+        if len(items) > settings.RECIPE_BATCH_MAX_SIZE:
+            raise ValidationError({
+                'detail': f'At most {settings.RECIPE_BATCH_MAX_SIZE} '
+                          f'recipes can be created at once.',
+            })
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': serializer.errors,
+                }
+
+        if valid:
+            list_serializer = self.get_serializer(many=True)
+            with transaction.atomic():
+                recipes = list_serializer.create([
+                    {**data, 'user': request.user} for _, data in valid
+                ])
+            created = self.get_queryset().filter(
+                id__in=[recipe.id for recipe in recipes],
+            ).in_bulk()
+            for (index, _), recipe in zip(valid, recipes):
+                results[index] = {
+                    'status': status.HTTP_201_CREATED,
+                    'data': self.get_serializer(created[recipe.id]).data,
+                }
+
+        return Response(
+            {'results': results},
+            status=(
+                status.HTTP_201_CREATED if valid
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'output',
+                OpenApiTypes.STR, enum=['ndjson', 'csv'],
+                description='Export format, ndjson by default.',
+            ),
+        ],
+        responses={status.HTTP_200_OK: OpenApiTypes.BINARY},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream all recipes matching the filters as NDJSON or CSV."""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            raise ValidationError({'output': 'Must be one of: ndjson, csv.'})
+
+        recipes = iter_recipes(
+            self.get_queryset().prefetch_related(None).order_by('id'),
+            settings.RECIPE_EXPORT_CHUNK_SIZE,
+        )
+        if output == 'csv':
+            response = StreamingHttpResponse(
+                csv_lines(recipes),
+                content_type='text/csv',
+            )
+        else:
+            response = StreamingHttpResponse(
+                ndjson_lines(recipes),
+                content_type='application/x-ndjson',
+            )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{output}"'
+        )
+
+        return response
+
+    @extend_schema(
+        responses={status.HTTP_200_OK: OpenApiTypes.OBJECT},
+    )
+    @action(methods=['GET'], detail=False, url_path='facets')
+    def facets(self, request):
+        """Count the recipes matching the filters per tag and ingredient.
+
+        Takes the same filters as the recipe list and returns
+        {'tags': [...], 'ingredients': [...]} with the id, name and
+        recipe count of every item used, most used first.
+        """
+        recipes = self.get_queryset()
+
+        return Response({
+            field: facet_counts(recipes, field) for field in FACET_FIELDS
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'size',
+                OpenApiTypes.STR,
+                description='Rendition size, the original image if absent.',
+            ),
+        ],
+        responses={
+            (status.HTTP_200_OK, 'image/*'): OpenApiTypes.BINARY,
+            status.HTTP_304_NOT_MODIFIED: None,
+            status.HTTP_404_NOT_FOUND: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(
+        methods=['GET'],
+        detail=True,
+        url_path='image',
+        content_negotiation_class=MediaContentNegotiation,
+    )
+    def image(self, request, pk=None):
+        """Deliver the image of a recipe owned by the user."""
+        recipe = self.get_object()
+        size = request.query_params.get('size')
+        if size:
+            name = recipe.image_renditions.get(size)
+        else:
+            name = recipe.image.name
+        if not name:
+            raise NotFound('Image not found.')
+
+        return serve_file(request, name)
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[RecipeImageParser],
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
         recipe = self.get_object()
+        old_image, old_renditions = recipe.image.name, recipe.image_renditions
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save(image_renditions={})
+            if old_image != recipe.image.name:
+                transaction.on_commit(
+                    lambda: release_image(old_image, old_renditions)
+                )
+            enqueue_renditions(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -104,17 +457,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items to assigned recipes',
-            )
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description='Autocomplete names, returns the best matches '
+                            'as a plain list instead of all items.',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Number of autocomplete matches.',
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(ConditionalGetMixin,
+                           CachedListMixin,
+                           RowListMixin,
+                           mixins.DestroyModelMixin,
                            mixins.UpdateModelMixin,
                            mixins.ListModelMixin,
                            viewsets.GenericViewSet):
     """Base viewset for recipe attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
@@ -123,11 +491,42 @@ class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
+        queryset = queryset.filter(user=self.request.user)
+        query = self._autocomplete_query()
+        if query:
+            return autocomplete(queryset, query)[:self._autocomplete_limit()]
 
-        return queryset.filter(
-            user=self.request.user
-            ).order_by('-name').distinct()
+        return queryset.order_by('-name')
+
+    def _autocomplete_query(self):
+        """Return the autocomplete query of a list request, if any."""
+        if self.action != 'list':
+            return ''
+
+        return self.request.query_params.get('q', '').strip()
+
+    def _autocomplete_limit(self):
+        """Return the requested number of autocomplete matches."""
+        limit = self.request.query_params.get(
+            'limit',
+            settings.RECIPE_AUTOCOMPLETE_LIMIT,
+        )
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+
+        return min(limit, settings.RECIPE_MAX_PAGE_SIZE)
+
+    def paginate_queryset(self, queryset):
+        """Return autocomplete matches as a plain list."""
+        if self._autocomplete_query():
+            return None
+
+        return super().paginate_queryset(queryset)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -0,0 +1,172 @@
+"""
+Authentication for the APIs.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Bounded in-process LRU of token keys to users with expiry."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached user payload for key, if still fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, payload, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+            return payload
+
+    def set(self, key, user_id, payload):
+        """Cache a user payload for key, evicting the oldest entries."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            expires = time.monotonic() + self.ttl
+            self._entries[key] = (user_id, payload, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        """Remove every key resolving to user_id from the cache."""
+        with self._lock:
+            for key in [
+                key for key, entry in self._entries.items()
+                if entry[0] == user_id
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+# The only user fields cached; the others are loaded on first access.
+CACHED_USER_FIELDS = ['id', 'is_active', 'is_staff', 'is_superuser']
+
+
+def _shared_cache():
+    """Return the Django cache shared between workers, if configured."""
+    if settings.TOKEN_CACHE_ALIAS:
+        return caches[settings.TOKEN_CACHE_ALIAS]
+
+    return None
+
+
+def _shared_key(key):
+    return f'auth-token:{key}'
+
+
+def _generation_key(key):
+    return f'auth-token-generation:{key}'
+
+
+def _cached_user(values):
+    """Return a user from cached field values, deferring the others."""
+    user_model = get_user_model()
+
+    return user_model.from_db(
+        router.db_for_read(user_model),
+        CACHED_USER_FIELDS,
+        [values[name] for name in CACHED_USER_FIELDS],
+    )
+
+
+def invalidate_tokens(keys, user_id=None):
+    """Drop cached resolutions of the token keys (and user) in all workers.
+
+    Deleting the generations of the keys invalidates the in-process
+    entries of every worker on their next use.
+    """
+    for key in keys:
+        token_cache.delete(key)
+    if user_id is not None:
+        token_cache.delete_user(user_id)
+    shared = _shared_cache()
+    if shared is not None and keys:
+        shared.delete_many(
+            [_shared_key(key) for key in keys]
+            + [_generation_key(key) for key in keys]
+        )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching token to user resolution.
+
+    Requires TOKEN_CACHE_ALIAS to name a Django cache shared by all
+    workers; without it every request resolves its token from the
+    database. Resolutions are cached in that cache and in a bounded
+    in-process LRU, both checked against a per-token generation in the
+    shared cache. Deleting a token or saving its user resets the
+    generation once committed, so revocation takes effect in every
+    worker on the next request. Only the ID and flags of the user are
+    cached.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the user and token for key, from cache when possible."""
+        shared = _shared_cache()
+        if shared is None:
+            return super().authenticate_credentials(key)
+
+        entry = token_cache.get(key)
+        if entry is not None:
+            values, generation = entry
+            if shared.get(_generation_key(key)) == generation:
+                user = _cached_user(values)
+                return (user, Token(key=key, user=user))
+            token_cache.delete(key)
+
+        # Taken before the database lookup below, so that an invalidation
+        # committed after the lookup marks the new entries stale.
+        generation_key = _generation_key(key)
+        shared.add(generation_key, uuid.uuid4().hex, settings.TOKEN_CACHE_TTL)
+        cached = shared.get_many([generation_key, _shared_key(key)])
+        generation = cached.get(generation_key)
+        if generation is None:
+            return super().authenticate_credentials(key)
+        entry = cached.get(_shared_key(key))
+        if entry is not None and entry[1] == generation:
+            values = entry[0]
+            user = _cached_user(values)
+            token = Token(key=key, user=user)
+        else:
+            user, token = super().authenticate_credentials(key)
+            values = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+            shared.set(
+                _shared_key(key),
+                (values, generation),
+                settings.TOKEN_CACHE_TTL,
+            )
+        token_cache.set(key, user.pk, (values, generation))
+
+        return (user, token)
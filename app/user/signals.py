@@ -0,0 +1,32 @@
+"""
+Signal handlers for the user app.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token once the deletion commits."""
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens([key]))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Drop cached resolutions of a user's tokens whenever it changes."""
+    keys = []
+    if settings.TOKEN_CACHE_ALIAS:
+        keys = list(
+            Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_tokens(keys, user_id=user_id))
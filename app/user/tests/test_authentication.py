@@ -0,0 +1,196 @@
+"""Tests for cached token authentication."""
+import pickle
+from unittest.mock import patch
+
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    TokenCache,
+    token_cache,
+)
+
+ME_URL = reverse('user:me')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        name='Test Name',
+    )
+
+
+@override_settings(TOKEN_CACHE_ALIAS='default')
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _token_queries(self):
+        """Return the number of token lookups of a request to ME_URL."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return len([
+            query for query in ctx.captured_queries
+            if 'authtoken_token' in query['sql']
+        ])
+
+    def test_token_resolved_once(self):
+        """Test repeated requests do not query the token again."""
+        self.assertEqual(self._token_queries(), 1)
+        self.assertEqual(self._token_queries(), 0)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(res.data['name'], self.user.name)
+
+    @override_settings(TOKEN_CACHE_ALIAS=None)
+    def test_no_caching_without_shared_cache(self):
+        """Test tokens are not cached without a cache shared by workers."""
+        self.assertEqual(self._token_queries(), 1)
+        self.assertEqual(self._token_queries(), 1)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops working immediately."""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected_by_other_workers(self):
+        """Test a deleted token is rejected despite in-process entries."""
+        self.client.get(ME_URL)
+        entry = token_cache.get(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        # The entry another worker still holds in its process.
+        token_cache.set(self.token.key, self.user.pk, entry)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user is rejected immediately."""
+        self.client.get(ME_URL)
+        entry = token_cache.get(self.token.key)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        token_cache.set(self.token.key, self.user.pk, entry)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_not_stale(self):
+        """Test changes to the user are visible on the next request."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    def test_shared_cache(self):
+        """Test users are resolved from the shared cache."""
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        self.assertEqual(self._token_queries(), 0)
+
+    def test_shared_cache_holds_no_credentials(self):
+        """Test only the ID and flags of the user are cached."""
+        self.client.get(ME_URL)
+
+        cached = pickle.dumps(cache.get(f'auth-token:{self.token.key}'))
+
+        self.assertNotIn(self.user.password.encode(), cached)
+        self.assertNotIn(self.user.email.encode(), cached)
+
+    def test_shared_cache_invalidated(self):
+        """Test deactivating a user clears the shared cache."""
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenCacheTests(TestCase):
+    """Test the in-process token cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays within its size."""
+        lru = TokenCache(max_size=2, ttl=60)
+        lru.set('a', 1, b'a')
+        lru.set('b', 2, b'b')
+        lru.get('a')
+        lru.set('c', 3, b'c')
+
+        self.assertEqual(lru.get('a'), b'a')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), b'c')
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped after the TTL."""
+        patched_monotonic.return_value = 100
+        lru = TokenCache(max_size=2, ttl=60)
+        lru.set('a', 1, b'a')
+
+        patched_monotonic.return_value = 159
+        self.assertEqual(lru.get('a'), b'a')
+        patched_monotonic.return_value = 160
+        self.assertIsNone(lru.get('a'))
+
+    def test_delete_user(self):
+        """Test removing all keys of a user."""
+        lru = TokenCache(max_size=3, ttl=60)
+        lru.set('a', 1, b'a')
+        lru.set('b', 1, b'b')
+        lru.set('c', 2, b'c')
+
+        lru.delete_user(1)
+
+        self.assertIsNone(lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), b'c')
@@ -1,13 +1,13 @@
 
 from rest_framework import (
     generics,
-    authentication,
     permissions,
 )
 
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from user.authentication import CachedTokenAuthentication
 from user.serializer import (
     UserSerializer,
     AuthTokenSerializer,
@@ -26,9 +26,15 @@ class CreateAuthTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """retrieve and return the authenticated user."""
-        return self.request.user
\ No newline at end of file
+        user = self.request.user
+        deferred = user.get_deferred_fields()
+        if deferred:
+            # Cached authentication loads only the ID and flags.
+            user.refresh_from_db(fields=deferred)
+
+        return user
\ No newline at end of file
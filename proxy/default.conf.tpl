@@ -5,6 +5,17 @@ server {
         alias /vol/static;
     }
 
+    # Recipe images are private, the app checks ownership and hands
+    # them to /protected-media/ with X-Accel-Redirect.
+    location /static/media/uploads/ {
+        return 404;
+    }
+
+    location /protected-media/ {
+        internal;
+        alias /vol/static/media/;
+    }
+
     location / {
         uwsgi_pass           ${APP_HOST}:${APP_PORT};
         include              /etc/nginx/uwsgi_params;